@@ -0,0 +1,103 @@
+# Client latency: original call_api path (fresh connection, /predict then /explain)
+# vs the pooled APIClient hitting /score once.
+# Starts the Flask app in-process unless --url is given.
+# Usage: python benchmarks/bench_client.py [--requests 200] [--rows 1]
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+DATA_PATH = os.path.join(ROOT, "data", "dataset-churn.csv")
+
+
+def legacy_call(url, data_json):
+    # Previous utils.call_api: module-level requests.post, new connection, two round trips
+    response_predict = requests.post(f"{url}/predict", json=data_json)
+    response_shap = requests.post(f"{url}/explain", json=data_json)
+    return response_predict.json(), response_shap.json()
+
+
+def summarize(label, latencies):
+    latencies = np.array(latencies) * 1e3
+    print(f"{label:<32}{latencies.mean():>10.2f}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 99):>10.2f}")
+
+
+def start_server(port):
+    from werkzeug.serving import make_server
+    import flask_api
+
+    server = make_server("127.0.0.1", port, flask_api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API client latency benchmark")
+    parser.add_argument("--url", default=None, help="Existing API, otherwise one is started in-process")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=1)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = start_server(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    from utils import APIClient, call_api, call_api_async, collect_encode_ui
+
+    raw = pd.read_csv(DATA_PATH).head(args.rows)
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce').fillna(0.0)
+    df = collect_encode_ui(input_df=raw)
+    data_json = df.to_dict(orient='list')
+    client = APIClient(base_url=url)
+
+    # Warm up server-side caches equally for every path
+    legacy_call(url, data_json)
+    call_api(df, client=client)
+
+    print(f"{'path':<32}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    latencies = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        legacy_call(url, data_json)
+        latencies.append(time.perf_counter() - start)
+    summarize("legacy requests.post x2", latencies)
+
+    latencies = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        call_api(df, client=client)
+        latencies.append(time.perf_counter() - start)
+    summarize("pooled APIClient /score", latencies)
+
+    async def timed():
+        start = time.perf_counter()
+        await call_api_async(df, client=client)
+        return time.perf_counter() - start
+
+    async def run_async():
+        return await asyncio.gather(*(timed() for _ in range(args.requests)))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_async())
+    wall = time.perf_counter() - start
+    summarize("async APIClient /score", latencies)
+    print(f"async wall time for {args.requests} concurrent calls: {wall * 1e3:.1f} ms")
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
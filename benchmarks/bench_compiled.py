@@ -0,0 +1,70 @@
+# Compiled (flattened NumPy trees) vs CatBoost predict_proba: parity on data/dataset-churn.csv, then timings
+# Usage: python benchmarks/bench_compiled.py [--sizes 1,100,100000] [--atol 1e-12] [--save compiled.npz]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from compiled import CompiledTrees  # noqa: E402
+from encoder import encode_columns  # noqa: E402
+
+DATA_PATH = os.path.join(ROOT, "data", "dataset-churn.csv")
+MODEL_PATH = os.path.join(ROOT, "models", "catboost_model.cbm")
+
+
+def timeit(fn, min_seconds=1.0):
+    fn()  # warm-up
+    timings = []
+    deadline = time.perf_counter() + min_seconds
+    while len(timings) < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled inference parity + benchmark")
+    parser.add_argument("--sizes", default="1,100,100000", help="Comma-separated batch sizes")
+    parser.add_argument("--atol", type=float, default=1e-12)
+    parser.add_argument("--save", default=None, help="Also write the compiled arrays to this .npz file")
+    args = parser.parse_args()
+
+    model = CatBoostClassifier()
+    model.load_model(MODEL_PATH)
+    start = time.perf_counter()
+    compiled = CompiledTrees.from_catboost(model)
+    print(f"Compiled {len(compiled.roots)} trees, {len(compiled.feature)} nodes, depth {compiled.depth} "
+          f"in {time.perf_counter() - start:.2f}s")
+    if args.save:
+        compiled.save(args.save)
+        compiled = CompiledTrees.load(args.save)
+
+    raw = pd.read_csv(DATA_PATH)
+    # Keep blank TotalCharges as NaN so missing-value routing is checked too
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce')
+    features = encode_columns(raw)
+
+    expected = model.predict_proba(features)[:, 1]
+    actual = compiled.predict_proba(features)
+    max_diff = float(np.abs(expected - actual).max())
+    print(f"Parity on {len(features)} rows: max |diff| {max_diff:.3e}, "
+          f"bit-identical {np.mean(expected == actual):.1%}")
+    assert max_diff <= args.atol, f"compiled predictions differ from predict_proba by {max_diff}"
+
+    print(f"{'rows':>8} {'catboost ms':>12} {'compiled ms':>12} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        batch = features[np.arange(size) % len(features)]
+        native = timeit(lambda: model.predict_proba(batch)[:, 1])
+        flat = timeit(lambda: compiled.predict_proba(batch))
+        print(f"{size:>8} {native * 1000:>12.3f} {flat * 1000:>12.3f} {native / flat:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Encode cost: legacy pandas get_dummies path vs the precompiled encoder
+# Usage: python benchmarks/bench_encode.py [--repeat 200]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from encoder import ENCODED_COLUMNS, CATEGORICAL_FEATURES, encode_columns, encode_records, to_frame  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "dataset-churn.csv")
+
+
+# Previous utils.collect_encode_ui, kept here as the baseline
+def pandas_encode(data):
+    df = pd.DataFrame(data)
+    df_encoded = pd.get_dummies(df, columns=['Contract', 'InternetService', 'PaymentMethod'], drop_first=False)
+    df_encoded = df_encoded.reindex(columns=ENCODED_COLUMNS, fill_value=0)
+    df_encoded[CATEGORICAL_FEATURES] = df_encoded[CATEGORICAL_FEATURES].astype('category')
+    df_encoded[['SeniorCitizen', 'tenure']] = df_encoded[['SeniorCitizen', 'tenure']].astype('int64')
+    df_encoded[['MonthlyCharges', 'TotalCharges']] = df_encoded[['MonthlyCharges', 'TotalCharges']].astype('float64')
+    return df_encoded
+
+
+def load_raw():
+    raw = pd.read_csv(DATA_PATH)
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce').fillna(0.0)
+    return raw.drop(columns=['customerID', 'Churn'])
+
+
+def timeit(fn, repeat):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode benchmark")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    raw = load_raw()
+    single_record = raw.iloc[0].to_dict()
+    single_columns = {col: [value] for col, value in single_record.items()}
+    batch_columns = raw.to_dict(orient='list')
+
+    # Sanity check: both paths produce the same values
+    expected = pandas_encode(batch_columns)
+    actual = to_frame(encode_columns(batch_columns))
+    assert (expected[CATEGORICAL_FEATURES].astype(str) == actual[CATEGORICAL_FEATURES].astype(str)).all().all()
+    assert np.allclose(expected.drop(columns=CATEGORICAL_FEATURES).to_numpy(dtype=float),
+                       actual.drop(columns=CATEGORICAL_FEATURES).to_numpy(dtype=float))
+
+    rows = len(raw)
+    cases = [
+        ("per-row   pandas get_dummies", lambda: pandas_encode(single_columns), 1),
+        ("per-row   encode_records", lambda: encode_records([single_record]), 1),
+        ("per-row   encode_columns", lambda: encode_columns(single_columns), 1),
+        (f"batch {rows} pandas get_dummies", lambda: pandas_encode(batch_columns), rows),
+        (f"batch {rows} encode_columns", lambda: encode_columns(batch_columns), rows),
+        (f"batch {rows} encode_columns+frame", lambda: to_frame(encode_columns(batch_columns)), rows),
+    ]
+
+    print(f"{'case':<36}{'median ms':>12}{'us/row':>12}")
+    for name, fn, n in cases:
+        repeat = args.repeat if n == 1 else max(args.repeat // 20, 5)
+        seconds = timeit(fn, repeat)
+        print(f"{name:<36}{seconds * 1e3:>12.3f}{seconds * 1e6 / n:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Cold-start benchmark: import time and time-to-first-prediction for each entry point,
+# each measured in a fresh interpreter.
+# Usage: python benchmarks/bench_startup.py [--runs 3]
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+
+RECORD = {
+    'gender': 'Male', 'SeniorCitizen': 0, 'Partner': 'Yes', 'Dependents': 'Yes', 'tenure': 72,
+    'PhoneService': 'Yes', 'MultipleLines': 'Yes', 'OnlineSecurity': 'Yes', 'OnlineBackup': 'Yes',
+    'DeviceProtection': 'Yes', 'TechSupport': 'No', 'StreamingTV': 'Yes', 'StreamingMovies': 'No',
+    'PaperlessBilling': 'Yes', 'MonthlyCharges': 50.75, 'TotalCharges': 610.0,
+    'Contract': 'Two year', 'InternetService': 'Fiber optic', 'PaymentMethod': 'Credit card (automatic)',
+}
+
+# Each snippet prints {"import_s": ..., "first_prediction_s": ...}
+ENTRY_POINTS = {
+    'flask_api': """
+import flask_api
+t_import = time.perf_counter()
+client = flask_api.app.test_client()
+response = client.post('/score', json={k: [v] for k, v in RECORD.items()})
+assert response.status_code == 200, response.data
+t_first = time.perf_counter()
+""",
+    'predict': """
+import predict
+t_import = time.perf_counter()
+result = predict.predict_churn(RECORD)
+assert 'Churn Probability' in result, result
+t_first = time.perf_counter()
+""",
+    # The UI scores through the API; its first prediction is the encode step it runs itself
+    'interface_solara': """
+import interface_solara
+t_import = time.perf_counter()
+interface_solara.collect_encode_ui(data_dict={k: [v] for k, v in RECORD.items()})
+t_first = time.perf_counter()
+""",
+}
+
+
+def measure(entry_point):
+    code = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"RECORD = {RECORD!r}\n"
+        + ENTRY_POINTS[entry_point]
+        + "print(json.dumps({'import_s': t_import - t0, 'first_prediction_s': t_first - t0}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'entry point':<20}{'import s':>12}{'first pred s':>14}")
+    for entry_point in ENTRY_POINTS:
+        runs = [measure(entry_point) for _ in range(args.runs)]
+        results[entry_point] = {
+            'import_s': float(np.median([r['import_s'] for r in runs])),
+            'first_prediction_s': float(np.median([r['first_prediction_s'] for r in runs])),
+        }
+        print(f"{entry_point:<20}{results[entry_point]['import_s']:>12.3f}{results[entry_point]['first_prediction_s']:>14.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
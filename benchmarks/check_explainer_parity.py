@@ -0,0 +1,60 @@
+# Parity + timing check for the explainer backends on data/dataset-churn.csv.
+# shap.TreeExplainer runs CatBoost's own ShapValues for CatBoost models, so the values must match
+# exactly and the timings are expected to be the same; the native backend only saves the shap
+# import. This guards EXPLAINER_BACKEND switches, it doesn't measure a speedup.
+# Usage: python benchmarks/check_explainer_parity.py [--rows 1000] [--atol 1e-6] [--thread-count -1]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from encoder import encode_columns  # noqa: E402
+from explainers import build_explainer  # noqa: E402
+
+DATA_PATH = os.path.join(ROOT, "data", "dataset-churn.csv")
+MODEL_PATH = os.path.join(ROOT, "models", "catboost_model.cbm")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explainer backend parity check")
+    parser.add_argument("--atol", type=float, default=1e-6)
+    parser.add_argument("--thread-count", type=int, default=-1)
+    parser.add_argument("--rows", type=int, default=None, help="Only explain the first N rows")
+    args = parser.parse_args()
+
+    model = CatBoostClassifier()
+    model.load_model(MODEL_PATH)
+
+    raw = pd.read_csv(DATA_PATH)
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce').fillna(0.0)
+    if args.rows is not None:
+        raw = raw.head(args.rows)
+    features = encode_columns(raw)
+
+    start = time.perf_counter()
+    import shap  # noqa: F401
+    print(f"import shap {time.perf_counter() - start:8.3f}s  (skipped by the catboost backend)")
+
+    results = {}
+    for backend in ('shap', 'catboost'):
+        explainer = build_explainer(model, backend=backend, thread_count=args.thread_count)
+        start = time.perf_counter()
+        results[backend] = np.asarray(explainer.shap_values(features))
+        print(f"{backend:<10} {time.perf_counter() - start:8.3f}s  shape={results[backend].shape}")
+
+    max_diff = float(np.abs(results['shap'] - results['catboost']).max())
+    print(f"max |diff| = {max_diff:.3e}")
+    if results['shap'].shape != results['catboost'].shape or max_diff > args.atol:
+        print("FAIL: explainer backends disagree")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Parity + timing check for the fused explain-and-score path (ServedModel.explain_and_score)
+# against predict_proba, for every model artifact in models/.
+# Usage: python benchmarks/check_fused_parity.py [--rows 1000] [--atol 1e-6] [--thread-count -1]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from encoder import encode_columns  # noqa: E402
+from explainers import shap_values_and_expected  # noqa: E402
+from registry import MODEL_KINDS, load_served_model  # noqa: E402
+
+DATA_PATH = os.path.join(ROOT, "data", "dataset-churn.csv")
+MODELS_DIR = os.path.join(ROOT, "models")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fused explain-and-score parity check")
+    parser.add_argument("--atol", type=float, default=1e-6)
+    parser.add_argument("--thread-count", type=int, default=-1)
+    parser.add_argument("--rows", type=int, default=1000, help="Only score the first N rows")
+    args = parser.parse_args()
+
+    raw = pd.read_csv(DATA_PATH, nrows=args.rows)
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce')
+    features = encode_columns(raw)
+
+    failed = False
+    for filename in sorted(os.listdir(MODELS_DIR)):
+        if os.path.splitext(filename)[1] not in MODEL_KINDS:
+            continue
+        served = load_served_model(os.path.join(MODELS_DIR, filename), thread_count=args.thread_count)
+        served.explain_and_score(features[:1])  # builds the explainer
+
+        expected, predict_seconds = timed(lambda: served.predict_proba(features))
+        _, shap_seconds = timed(lambda: served.shap_values(features))
+        (fused, fused_shap), fused_seconds = timed(lambda: served.explain_and_score(features))
+
+        # How far the SHAP sum is from the model output, whether or not the fused path uses it
+        values, base = shap_values_and_expected(served.explainer, features)
+        additivity_gap = float(np.abs(1.0 / (1.0 + np.exp(-(values.sum(axis=1) + base))) - expected).max())
+        max_diff = float(np.abs(fused - expected).max())
+        shap_diff = float(np.abs(fused_shap - values).max())
+
+        print(f"{served.name:<10} additive={served.shap_is_additive!s:<5} "
+              f"SHAP-sum gap={additivity_gap:.3e}  fused max |diff|={max_diff:.3e}")
+        print(f"{'':<10} predict+shap {predict_seconds + shap_seconds:8.3f}s   explain_and_score {fused_seconds:8.3f}s")
+        if max_diff > args.atol or shap_diff > args.atol:
+            print(f"FAIL: {served.name} explain_and_score disagrees with predict_proba/shap_values")
+            failed = True
+        if served.shap_is_additive and additivity_gap > args.atol:
+            print(f"FAIL: {served.name} is marked additive but its SHAP values don't sum to the prediction")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Renders the SHAP views repeatedly and checks the Plotly figures they send: how many figures
+# and how many JSON bytes each render carries, and that unchanged SHAP values reuse the
+# memoized figure instead of building a new one.
+# Usage: python benchmarks/check_plot_figures.py [--renders 50] [--max-kb 64]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import solara
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+import interface_solara as ui  # noqa: E402
+from encoder import ENCODED_COLUMNS  # noqa: E402
+from plots import figure_cache_info  # noqa: E402
+
+
+@solara.component
+def Views():
+    ui.show_shap()
+    ui.show_shap_batch(ui.fts, ui.shap_values_batch)
+
+
+def render_once():
+    # -> (Plotly figures in the rendered tree, their JSON payload sizes in bytes)
+    box, rc = solara.render(Views(), handle_error=False)
+    try:
+        widgets = rc.find(go.FigureWidget).widgets
+        return len(widgets), [len(widget.to_json()) for widget in widgets]
+    finally:
+        rc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SHAP plot figure payload/caching check")
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--max-kb", type=float, default=64, help="Largest acceptable payload per figure")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ui.df = pd.DataFrame(columns=ENCODED_COLUMNS)  # show_shap only reads the column names
+    ui.shap_values.value = rng.normal(size=(1, len(ENCODED_COLUMNS)))
+    ui.shap_values_batch.value = {
+        'rows': 10,
+        'mean_abs': np.abs(rng.normal(size=len(ENCODED_COLUMNS))).tolist(),
+        'mean': rng.normal(size=len(ENCODED_COLUMNS)).tolist(),
+        'quantiles': {},
+    }
+
+    builds_before = figure_cache_info()['builds']
+    counts, sizes = [], []
+    start = time.perf_counter()
+    for _ in range(args.renders):
+        count, payloads = render_once()
+        counts.append(count)
+        sizes.append(payloads)
+    elapsed = time.perf_counter() - start
+    unchanged_builds = figure_cache_info()['builds'] - builds_before
+
+    # New single-customer values: exactly that one figure is rebuilt
+    ui.shap_values.value = rng.normal(size=(1, len(ENCODED_COLUMNS)))
+    render_once()
+    changed_builds = figure_cache_info()['builds'] - builds_before - unchanged_builds
+
+    per_render = [sum(payloads) for payloads in sizes]
+    largest = max(max(payloads) for payloads in sizes)
+    print(f"{args.renders} renders in {elapsed * 1e3:.1f} ms ({elapsed * 1e3 / args.renders:.2f} ms/render)")
+    print(f"figures per render: {min(counts)}-{max(counts)}, payload per render {np.mean(per_render) / 1024:.1f} KB, "
+          f"largest figure {largest / 1024:.1f} KB")
+    print(f"figures built: {unchanged_builds} over {args.renders} unchanged renders, "
+          f"{changed_builds} after one value change")
+    print(f"figure cache: {figure_cache_info()}")
+
+    failures = []
+    if set(counts) != {2}:
+        failures.append(f"expected 2 figures per render, got {sorted(set(counts))}")
+    if unchanged_builds > 2:
+        failures.append("repeated renders with the same values built new figures")
+    if changed_builds != 1:
+        failures.append(f"changing one view's values built {changed_builds} figures, expected 1")
+    if largest > args.max_kb * 1024:
+        failures.append(f"a figure payload is {largest / 1024:.1f} KB, over {args.max_kb} KB")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
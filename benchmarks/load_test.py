@@ -0,0 +1,138 @@
+# Load test for POST /predict: throughput and p50/p99 latency
+# Against a running server:      python benchmarks/load_test.py --url http://127.0.0.1:5000
+# Single vs multi-worker gunicorn: python benchmarks/load_test.py --compare 1,4
+# Every target is measured three times: "uncached" sends a distinct payload per request to a
+# server without a cache (CACHE_MAX_ENTRIES=0), "cache miss" sends distinct payloads with
+# probabilities cached (the cost of keying and storing rows that never come back), and
+# "cache hit" cycles through 64 payloads the cache has seen.
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DATA_PATH = os.path.join(ROOT, "data", "dataset-churn.csv")
+
+
+def load_payloads(n_payloads, rows_per_request, unique=False):
+    raw = pd.read_csv(DATA_PATH).drop(columns=['customerID', 'Churn'])
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce').fillna(0.0)
+    if unique:
+        # Distinct MonthlyCharges in every row of every payload, so no row can be a cache hit
+        rows = raw.sample(n_payloads * rows_per_request, replace=True, random_state=0).reset_index(drop=True)
+        rows['MonthlyCharges'] = rows['MonthlyCharges'].round(2) + (np.arange(len(rows)) + 1) * 1e-6
+        return [rows.iloc[i * rows_per_request:(i + 1) * rows_per_request].to_dict(orient='list')
+                for i in range(n_payloads)]
+    payloads = []
+    for i in range(n_payloads):
+        start = (i * rows_per_request) % (len(raw) - rows_per_request)
+        payloads.append(raw.iloc[start:start + rows_per_request].to_dict(orient='list'))
+    return payloads
+
+
+def run_load(url, payloads, requests_total, concurrency):
+    session_per_thread = {}
+
+    def one(i):
+        session = session_per_thread.setdefault(i % concurrency, requests.Session())
+        start = time.perf_counter()
+        response = session.post(f"{url}/predict", json=payloads[i % len(payloads)], timeout=60)
+        elapsed = time.perf_counter() - start
+        return elapsed, response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests_total)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1e3
+    errors = sum(1 for r in results if not r[1])
+    return {
+        'requests': requests_total,
+        'errors': errors,
+        'throughput_rps': requests_total / wall,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def wait_ready(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+def spawn_gunicorn(workers, port, threads, cache=True):
+    env = dict(os.environ, API_WORKERS=str(workers), API_THREADS=str(threads), API_BIND=f"127.0.0.1:{port}")
+    if cache:
+        env['CACHE_NAMESPACES'] = "proba,shap"  # /predict results are only cached with proba on
+    else:
+        env['CACHE_MAX_ENTRIES'] = "0"
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+         "--chdir", os.path.join(ROOT, "src"), "flask_api:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def report(label, stats):
+    print(f"{label:<32}{stats['throughput_rps']:>12.1f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /predict")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=1, help="Rows per request")
+    parser.add_argument("--compare", default=None, help="Comma separated gunicorn worker counts to spawn, e.g. 1,4")
+    parser.add_argument("--threads", type=int, default=2, help="Threads per spawned gunicorn worker")
+    parser.add_argument("--port", type=int, default=5055, help="Port for spawned servers")
+    args = parser.parse_args()
+
+    warmup = min(args.requests, 100)
+    cached_payloads = load_payloads(64, args.rows)
+    unique_payloads = load_payloads(warmup + args.requests, args.rows, unique=True)
+    runs = [
+        # (label, warm-up payloads, measured payloads, spawned server has a cache)
+        ("uncached", unique_payloads[:warmup], unique_payloads[warmup:], False),
+        ("cache miss", unique_payloads[:warmup], unique_payloads[warmup:], True),
+        ("cache hit", cached_payloads, cached_payloads, True),
+    ]
+    print(f"{'target':<32}{'req/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+
+    if args.compare is None:
+        # The running server's cache settings apply, so only unique vs repeated rows can be told apart
+        for label, warm, measured in (("unique", unique_payloads[:warmup], unique_payloads[warmup:]),
+                                      ("repeated", cached_payloads, cached_payloads)):
+            run_load(args.url, warm, warmup, args.concurrency)
+            report(f"{args.url} {label}", run_load(args.url, measured, args.requests, args.concurrency))
+        return
+
+    url = f"http://127.0.0.1:{args.port}"
+    for workers in [int(w) for w in args.compare.split(",")]:
+        for label, warm, measured, cache in runs:
+            server = spawn_gunicorn(workers, args.port, args.threads, cache=cache)
+            try:
+                wait_ready(url)
+                run_load(url, warm, warmup, args.concurrency)
+                report(f"{workers} worker(s) {label}", run_load(url, measured, args.requests, args.concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
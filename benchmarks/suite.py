@@ -0,0 +1,261 @@
+# Benchmark suite: encode, predict, explain and HTTP round trips on data/dataset-churn.csv
+# replicated to synthetic sizes. Results go to JSON; --baseline flags slowdowns against a previous run.
+# Usage: python benchmarks/suite.py [--sizes 1,100,10000] [--cases predict_proba,http_predict]
+#        [--output results.json] [--baseline previous.json --threshold 1.25] [--no-caps]
+import argparse
+import importlib.metadata
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+DATA_PATH = os.path.join(ROOT, "data", "dataset-churn.csv")
+MODEL_PATH = os.path.join(ROOT, "models", "catboost_model.cbm")
+
+# The API reads these at import: local models, no cache hits, nothing loaded at import
+os.environ.setdefault("MODELS_DIR", os.path.join(ROOT, "models"))
+os.environ["CACHE_MAX_ENTRIES"] = "0"
+os.environ["API_EAGER_LOAD"] = "false"
+
+DEFAULT_SIZES = "1,10,100,1000,10000,100000,1000000"
+SEED = 0
+
+# Packages whose upgrades we want to catch, recorded with every run
+TRACKED_PACKAGES = ("catboost", "shap", "pandas", "numpy", "flask", "xgboost", "pyarrow")
+
+
+def load_raw():
+    raw = pd.read_csv(DATA_PATH)
+    raw['TotalCharges'] = pd.to_numeric(raw['TotalCharges'], errors='coerce').fillna(0.0)
+    return raw.drop(columns=['customerID', 'Churn'])
+
+
+def replicate(raw, rows):
+    # Deterministic synthetic dataset of `rows` rows: the real rows, reshuffled and tiled
+    order = np.random.default_rng(SEED).permutation(len(raw))
+    return raw.iloc[order[np.arange(rows) % len(raw)]].reset_index(drop=True)
+
+
+class Fixtures:
+    """Lazily built shared state (model, explainer, API client), reused across sizes."""
+
+    def __init__(self):
+        self._model = None
+        self._tree_explainer = None
+        self._client = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from catboost import CatBoostClassifier
+
+            self._model = CatBoostClassifier()
+            self._model.load_model(MODEL_PATH)
+        return self._model
+
+    @property
+    def tree_explainer(self):
+        if self._tree_explainer is None:
+            import shap
+
+            self._tree_explainer = shap.TreeExplainer(self.model)
+        return self._tree_explainer
+
+    @property
+    def client(self):
+        if self._client is None:
+            import flask_api
+
+            self._client = flask_api.app.test_client()
+        return self._client
+
+
+def _post_json(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+
+# name -> (setup(df, fixtures) -> zero-arg callable to time, default max rows or None)
+def _encode_utils(df, fx):
+    from utils import collect_encode_ui
+
+    return lambda: collect_encode_ui(input_df=df)
+
+
+def _encode_predict(df, fx):
+    from predict import collect_encode_ui
+
+    # predict.py encodes one customer at a time (the interactive path)
+    records = df.to_dict(orient='records')
+    return lambda: [collect_encode_ui(record) for record in records]
+
+
+def _predict_proba(df, fx):
+    from encoder import encode_columns
+
+    features = encode_columns(df)
+    model = fx.model
+    return lambda: model.predict_proba(features)
+
+
+def _tree_explainer(df, fx):
+    from encoder import encode_columns, to_frame
+
+    frame = to_frame(encode_columns(df))
+    explainer = fx.tree_explainer
+    return lambda: explainer.shap_values(frame)
+
+
+def _catboost_shap(df, fx):
+    from encoder import encode_columns
+    from explainers import build_explainer
+
+    features = encode_columns(df)
+    explainer = build_explainer(fx.model, backend='catboost')
+    return lambda: explainer.shap_values(features)
+
+
+def _http(path):
+    def setup(df, fx):
+        body = df.to_dict(orient='list')
+        client = fx.client
+        return lambda: _post_json(client, path, body)
+    return setup
+
+
+CASES = {
+    'encode_utils': (_encode_utils, None),
+    'encode_predict': (_encode_predict, 100000),
+    'predict_proba': (_predict_proba, None),
+    'tree_explainer': (_tree_explainer, 10000),
+    'catboost_shap': (_catboost_shap, 10000),
+    'http_predict': (_http('/predict'), 100000),
+    'http_score_shap': (_http('/score?shap=true'), 10000),
+}
+
+
+def measure(fn, min_seconds, max_repeat):
+    fn()  # warm-up (and lazy loads)
+    timings = []
+    deadline = time.perf_counter() + min_seconds
+    while len(timings) < max_repeat and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        if timings[-1] > min_seconds:
+            break  # big sizes: one timed run is enough
+    return timings
+
+
+def environment():
+    packages = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            packages[name] = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            packages[name] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': packages,
+        'seed': SEED,
+    }
+
+
+def compare(results, baseline, threshold):
+    # Cases whose median got slower than `threshold` x the baseline median
+    previous = {(r['case'], r['rows']): r for r in baseline['results'] if r.get('median_seconds')}
+    regressions = []
+    for result in results:
+        old = previous.get((result['case'], result['rows']))
+        if old is None or not result.get('median_seconds'):
+            continue
+        ratio = result['median_seconds'] / old['median_seconds']
+        result['baseline_ratio'] = ratio
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Churn API benchmark suite")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated row counts")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Comma-separated subset of {', '.join(CASES)}")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum timed seconds per case and size")
+    parser.add_argument("--max-repeat", type=int, default=200)
+    parser.add_argument("--no-caps", action="store_true", help="Run slow cases at every size (SHAP at 1M rows takes hours)")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Flag cases slower than this x baseline")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    cases = args.cases.split(',')
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown cases {unknown}, expected some of {list(CASES)}")
+
+    raw = load_raw()
+    fixtures = Fixtures()
+    results = []
+    print(f"{'case':<18}{'rows':>9}{'median ms':>13}{'rows/sec':>14}{'runs':>6}")
+    for rows in sizes:
+        df = replicate(raw, rows)
+        for case in cases:
+            setup, max_rows = CASES[case]
+            if max_rows is not None and rows > max_rows and not args.no_caps:
+                results.append({'case': case, 'rows': rows, 'skipped': f"above {max_rows} rows, use --no-caps"})
+                continue
+            timings = measure(setup(df, fixtures), args.min_seconds, args.max_repeat)
+            median = float(np.median(timings))
+            results.append({
+                'case': case,
+                'rows': rows,
+                'runs': len(timings),
+                'median_seconds': median,
+                'min_seconds': float(np.min(timings)),
+                'max_seconds': float(np.max(timings)),
+                'rows_per_second': rows / median,
+            })
+            print(f"{case:<18}{rows:>9}{median * 1e3:>13.3f}{rows / median:>14,.0f}{len(timings):>6}")
+
+    report = {'environment': environment(), 'results': results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        report['baseline'] = {'path': args.baseline, 'environment': baseline.get('environment'),
+                              'threshold': args.threshold}
+        report['regressions'] = [{'case': r['case'], 'rows': r['rows'], 'ratio': r['baseline_ratio']}
+                                 for r in regressions]
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if regressions:
+        for r in regressions:
+            print(f"SLOWER: {r['case']} at {r['rows']} rows is {r['baseline_ratio']:.2f}x the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# Gunicorn configuration for the churn prediction API
+# Run with: gunicorn -c gunicorn.conf.py --chdir src flask_api:app
+# Graceful reload (new workers, in-flight requests finish): kill -HUP <master pid>
+import os
+
+bind = os.environ.get("API_BIND", "0.0.0.0:5000")
+
+# Worker processes and threads per worker
+workers = int(os.environ.get("API_WORKERS", os.cpu_count() or 1))
+threads = int(os.environ.get("API_THREADS", "2"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Import flask_api and load the model + explainer (API_EAGER_LOAD) once in the master
+# before forking, so workers share the loaded model pages copy-on-write and start warm
+preload_app = True
+os.environ.setdefault("API_EAGER_LOAD", "true")
+
+timeout = int(os.environ.get("API_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("API_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get("API_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
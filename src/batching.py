@@ -0,0 +1,110 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesces concurrent small predict calls into one model call.
+
+    Callers hand over an encoded matrix and the model to score it with, and block on the
+    result. A background thread collects requests for up to `max_wait_ms` or until
+    `max_batch_rows` rows are queued, scores the rows of each model with a single
+    `predict_fn(model, matrix)` call and fans the rows back out. Requests are only
+    coalesced with others for the same model instance, so a request that resolved a model
+    before a reload is still scored by that model.
+    """
+
+    def __init__(self, predict_fn, max_batch_rows=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # Metrics
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.batch_size_counts = Counter()  # requests coalesced per model call
+
+    def _ensure_started(self):
+        # Started lazily and per process: threads do not survive gunicorn's preload fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def predict(self, model, features):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((model, features, future))
+        return future.result()
+
+    def _collect(self):
+        items = [self._queue.get()]
+        rows = len(items[0][1])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[1])
+        return items, rows
+
+    def _run(self):
+        while True:
+            items, rows = self._collect()
+            groups = {}  # by model identity, in arrival order
+            for model, features, future in items:
+                groups.setdefault(id(model), (model, []))[1].append((features, future))
+            for model, group in groups.values():
+                self._score(model, group)
+
+    def _score(self, model, group):
+        try:
+            matrix = group[0][0] if len(group) == 1 else np.concatenate([m for m, _ in group])
+            results = self.predict_fn(model, matrix)
+        except Exception as e:
+            for _, future in group:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for features, future in group:
+            future.set_result(results[offset:offset + len(features)])
+            offset += len(features)
+
+        with self._lock:
+            self.batches += 1
+            self.requests += len(group)
+            self.rows += offset
+            self.batch_size_counts[len(group)] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_batch_rows': self.max_batch_rows,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'batches': self.batches,
+                'requests': self.requests,
+                'rows': self.rows,
+                'mean_requests_per_batch': self.requests / self.batches if self.batches else 0.0,
+                'mean_rows_per_batch': self.rows / self.batches if self.batches else 0.0,
+                'batch_size_counts': {str(size): count for size, count in sorted(self.batch_size_counts.items())},
+            }
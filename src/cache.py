@@ -0,0 +1,141 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import repeat
+
+import numpy as np
+
+from encoder import CATEGORICAL_FEATURES, CATEGORY_VOCABULARIES, ENCODED_COLUMNS
+
+
+def file_version(path):
+    # Short content hash of a model artifact, used to namespace cache keys
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+# Encoded slots of the categorical columns, and one small integer per known category label
+_CATEGORY_SLOTS = np.array([ENCODED_COLUMNS.index(col) for col in CATEGORICAL_FEATURES])
+_NUMERIC_SLOTS = np.array([i for i in range(len(ENCODED_COLUMNS)) if i not in set(_CATEGORY_SLOTS)])
+_CATEGORY_CODES = {}
+for _col in CATEGORICAL_FEATURES:
+    for _label in CATEGORY_VOCABULARIES[_col]:
+        _CATEGORY_CODES.setdefault(_label, len(_CATEGORY_CODES))
+
+
+def row_keys(features, model_version):
+    """Stable per-row keys for an encoded (n, 26) matrix, namespaced by model version.
+
+    Each row is packed into 26 int64 words in one vectorized step (category codes, then the
+    float bits of the numeric slots with NaN and -0.0 normalized), so only the digest of
+    each row's bytes is computed in Python.
+    """
+    n_rows = len(features)
+    words = np.empty((n_rows, len(ENCODED_COLUMNS)), dtype=np.int64)
+
+    labels = features[:, _CATEGORY_SLOTS].ravel().tolist()
+    codes = np.fromiter(map(_CATEGORY_CODES.get, labels, repeat(-1)), dtype=np.int64, count=len(labels))
+    for i in np.flatnonzero(codes < 0):
+        # Labels outside the vocabularies (unvalidated input): Python's hash is stable for the
+        # life of the process, which is as long as the cache lives
+        codes[i] = hash(labels[i]) | (1 << 62)
+    words[:, _CATEGORY_SLOTS] = codes.reshape(n_rows, -1)
+
+    numbers = features[:, _NUMERIC_SLOTS].astype(np.float64)
+    numbers = np.where(np.isnan(numbers), np.nan, numbers) + 0.0
+    words[:, _NUMERIC_SLOTS] = numbers.view(np.int64)
+
+    prefix = model_version.encode()
+    rows = words.view(f"S{words.shape[1] * words.itemsize}").ravel().tolist()
+    return [hashlib.blake2b(prefix + row, digest_size=16).hexdigest() for row in rows]
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries=100000, ttl_seconds=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._data[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[1])
+        return values
+
+    def set_many(self, keys, values):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+def cached_rows(cache, keys, features, compute, namespace):
+    """Per-row cache lookup; only the rows that miss are passed to `compute(features)`.
+
+    `compute` returns an array with one entry (or row) per input row; so does this function.
+    """
+    if cache is None:
+        return compute(features)
+    namespaced = [f"{namespace}:{key}" for key in keys]
+    values = cache.get_many(namespaced)
+    missing = [i for i, value in enumerate(values) if value is None]
+    if len(missing) == len(keys):
+        # All rows are new: score the batch as given, no gather and no rebuilt result array
+        computed = np.asarray(compute(features))
+        # Copy rows so cached entries don't keep the whole batch array alive
+        cache.set_many(namespaced, [row.copy() for row in computed] if computed.ndim > 1 else computed.tolist())
+        return computed
+    if missing:
+        computed = compute(features[missing])
+        for i, value in zip(missing, computed):
+            values[i] = value.copy() if isinstance(value, np.ndarray) else value
+        cache.set_many([namespaced[i] for i in missing], [values[i] for i in missing])
+    return np.array(values)
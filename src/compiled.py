@@ -0,0 +1,181 @@
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from encoder import CATEGORICAL_FEATURES, CATEGORY_VOCABULARIES, ENCODED_COLUMNS
+
+
+# Rows evaluated per block, bounds the (rows x trees) node index arrays
+COMPILED_CHUNK_ROWS = 4096
+
+
+class CompiledTrees:
+    """A CatBoost model flattened into arrays and evaluated with vectorized NumPy.
+
+    Every split becomes "design column > threshold": float features are compared against
+    their float32 borders as CatBoost does, and each one-hot categorical split gets its own
+    0/1 column (value == category). All nodes of all trees live in one set of arrays; leaves
+    point to themselves with an infinite threshold, so evaluation is `depth` gather steps
+    over a (rows x trees) matrix of node indices.
+    """
+
+    def __init__(self, column_index, column_key, feature, threshold, left, right, value, roots, depth, scale, bias):
+        self.column_index = np.asarray(column_index, dtype=np.int64)  # position in ENCODED_COLUMNS
+        self.column_key = [str(key) for key in column_key]  # category for one-hot columns, '' for floats
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.scale = float(scale)
+        self.bias = float(bias)
+
+        is_cat = np.array([bool(key) for key in self.column_key], dtype=bool)
+        self._float_columns = np.flatnonzero(~is_cat)
+        self._cat_columns = np.flatnonzero(is_cat)
+        self._cat_keys = np.array([key for key in self.column_key if key], dtype=object)
+        # children[2 * node + go_right] is the next node
+        self._children = np.stack([self.left, self.right], axis=1).ravel()
+
+    @classmethod
+    def from_catboost(cls, model):
+        """Export a loaded CatBoostClassifier (float and one-hot splits only, no CTRs)."""
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "model.json")
+            pmml_path = os.path.join(tmp, "model.pmml")
+            model.save_model(json_path, format='json')
+            # The JSON export stores categories as hashes; the PMML export maps them back to
+            # strings given a pool that contains them, so one row per vocabulary entry is enough
+            model.save_model(pmml_path, format='pmml', pool=_vocabulary_pool())
+            with open(json_path) as f:
+                exported = json.load(f)
+            category_keys = _pmml_category_keys(pmml_path)
+        return cls._from_json(exported, category_keys)
+
+    @classmethod
+    def _from_json(cls, exported, category_keys):
+        info = exported['features_info']
+        if info.get('ctrs'):
+            raise ValueError("Models with CTR features can't be compiled, only float and one-hot splits")
+        float_flat = {f['feature_index']: f['flat_feature_index'] for f in info.get('float_features', [])}
+        cat_features = {f['feature_index']: f for f in info.get('categorical_features', [])}
+
+        columns = {}  # (flat index, key) -> design column
+
+        def column(flat_index, key=''):
+            return columns.setdefault((flat_index, key), len(columns))
+
+        feature, threshold, left, right, value = [], [], [], [], []
+
+        def add(node):
+            idx = len(feature)
+            feature.append(0)
+            threshold.append(np.inf)
+            left.append(idx)
+            right.append(idx)
+            value.append(0.0)
+            if 'split' not in node:
+                value[idx] = float(node['value'])
+                return idx, 0
+
+            split = node['split']
+            if split['split_type'] == 'FloatFeature':
+                feature[idx] = column(float_flat[split['float_feature_index']])
+                threshold[idx] = split['border']
+            elif split['split_type'] == 'OneHotFeature':
+                cat = cat_features[split['cat_feature_index']]
+                position = cat['values'].index(split['value'])
+                feature[idx] = column(cat['flat_feature_index'], category_keys[cat['feature_id']][position])
+                threshold[idx] = 0.5
+            else:
+                raise ValueError(f"Unsupported split type '{split['split_type']}'")
+            # CatBoost sends "value > border" (and "category matches") to the right child
+            left[idx], left_depth = add(node['left'])
+            right[idx], right_depth = add(node['right'])
+            return idx, 1 + max(left_depth, right_depth)
+
+        roots, depth = [], 0
+        for tree in exported['trees']:
+            root, tree_depth = add(tree)
+            roots.append(root)
+            depth = max(depth, tree_depth)
+
+        scale, bias = exported.get('scale_and_bias', [1.0, [0.0]])
+        bias = bias[0] if isinstance(bias, list) else bias
+
+        ordered = sorted(columns, key=columns.get)
+        return cls(
+            [flat for flat, _ in ordered], [key for _, key in ordered],
+            feature, threshold, left, right, value, roots, depth, scale, bias,
+        )
+
+    def save(self, path):
+        np.savez(
+            path,
+            column_index=self.column_index, column_key=np.array(self.column_key, dtype=str),
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            value=self.value, roots=self.roots, depth=self.depth, scale=self.scale, bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def design_matrix(self, features):
+        # Encoded (n, 26) matrix -> float32 (n, n_columns) of the values the splits compare
+        features = np.asarray(features, dtype=object)
+        design = np.empty((len(features), len(self.column_index)), dtype=np.float32)
+        design[:, self._float_columns] = features[:, self.column_index[self._float_columns]].astype(np.float64)
+        design[:, self._cat_columns] = features[:, self.column_index[self._cat_columns]] == self._cat_keys
+        return design
+
+    def raw_predict(self, features):
+        design = self.design_matrix(features)
+        n_columns = design.shape[1]
+        raw = np.empty(len(design))
+        for start in range(0, len(design), COMPILED_CHUNK_ROWS):
+            block = design[start:start + COMPILED_CHUNK_ROWS].ravel()
+            # Offset of each row in the flattened block, so one take() gathers every tree's value
+            offsets = np.arange(0, len(block), n_columns)[:, None]
+            node = np.broadcast_to(self.roots, (len(offsets), len(self.roots)))
+            for _ in range(self.depth):
+                go_right = block.take(offsets + self.feature.take(node)) > self.threshold.take(node)
+                node = self._children.take(2 * node + go_right)
+            raw[start:start + len(offsets)] = self.value.take(node).sum(axis=1)
+        return raw * self.scale + self.bias
+
+    def predict_proba(self, features):
+        # Churn probability per row, same as CatBoostClassifier.predict_proba(...)[:, 1]
+        return 1.0 / (1.0 + np.exp(-self.raw_predict(features)))
+
+
+def _vocabulary_pool():
+    from encoder import to_pool
+
+    rows = max(len(values) for values in CATEGORY_VOCABULARIES.values())
+    matrix = np.zeros((rows, len(ENCODED_COLUMNS)), dtype=object)
+    for col in CATEGORICAL_FEATURES:
+        values = CATEGORY_VOCABULARIES[col]
+        matrix[:, ENCODED_COLUMNS.index(col)] = [values[i % len(values)] for i in range(rows)]
+    return to_pool(matrix)
+
+
+def _pmml_category_keys(path):
+    # <feature>_mapped DerivedFields: category string -> position in the model's one-hot values
+    keys = {}
+    for element in ET.parse(path).iter():
+        if not element.tag.endswith('DerivedField') or not element.get('name', '').endswith('_mapped'):
+            continue
+        mapping = {}
+        for row in element.iter():
+            if row.tag.endswith('row'):
+                cells = {child.tag.rsplit('}', 1)[-1]: child.text for child in row}
+                mapping[int(cells['value'])] = cells['key']
+        keys[element.get('name')[:-len('_mapped')]] = [mapping[i] for i in range(len(mapping))]
+    return keys
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+# Raw customer attributes, in the order the UI and predict.py collect them
+RAW_FEATURES = [
+    'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
+    'PhoneService', 'MultipleLines', 'OnlineSecurity', 'OnlineBackup',
+    'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
+    'PaperlessBilling', 'MonthlyCharges', 'TotalCharges',
+    'Contract', 'InternetService', 'PaymentMethod'
+]
+
+# Columns the model reads as CatBoost categorical features
+CATEGORICAL_FEATURES = [
+    'gender', 'Partner', 'Dependents', 'PhoneService', 'MultipleLines',
+    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport',
+    'StreamingTV', 'StreamingMovies', 'PaperlessBilling'
+]
+
+# Category sets of the categorical columns in data/dataset-churn.csv (sorted, as pandas orders them)
+CATEGORY_VOCABULARIES = {
+    'gender': ['Female', 'Male'],
+    'Partner': ['No', 'Yes'],
+    'Dependents': ['No', 'Yes'],
+    'PhoneService': ['No', 'Yes'],
+    'MultipleLines': ['No', 'No phone service', 'Yes'],
+    'OnlineSecurity': ['No', 'No internet service', 'Yes'],
+    'OnlineBackup': ['No', 'No internet service', 'Yes'],
+    'DeviceProtection': ['No', 'No internet service', 'Yes'],
+    'TechSupport': ['No', 'No internet service', 'Yes'],
+    'StreamingTV': ['No', 'No internet service', 'Yes'],
+    'StreamingMovies': ['No', 'No internet service', 'Yes'],
+    'PaperlessBilling': ['No', 'Yes'],
+}
+
+INTEGER_FEATURES = ['SeniorCitizen', 'tenure']
+FLOAT_FEATURES = ['MonthlyCharges', 'TotalCharges']
+
+# Fixed one-hot vocabularies, same categories pd.get_dummies produced at training time
+ONE_HOT_VOCABULARIES = {
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'InternetService': ['DSL', 'Fiber optic', 'No'],
+    'PaymentMethod': [
+        'Bank transfer (automatic)', 'Credit card (automatic)',
+        'Electronic check', 'Mailed check'
+    ],
+}
+
+# Model input layout (26 columns)
+ENCODED_COLUMNS = [
+    'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
+    'PhoneService', 'MultipleLines', 'OnlineSecurity', 'OnlineBackup',
+    'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
+    'PaperlessBilling', 'MonthlyCharges', 'TotalCharges',
+    'Contract_Month-to-month', 'Contract_One year', 'Contract_Two year',
+    'InternetService_DSL', 'InternetService_Fiber optic', 'InternetService_No',
+    'PaymentMethod_Bank transfer (automatic)', 'PaymentMethod_Credit card (automatic)',
+    'PaymentMethod_Electronic check', 'PaymentMethod_Mailed check'
+]
+
+N_ENCODED = len(ENCODED_COLUMNS)
+CAT_FEATURE_INDICES = [ENCODED_COLUMNS.index(col) for col in CATEGORICAL_FEATURES]
+
+# Precompiled column slots so encoding never searches column names per request
+_CAT_SLOTS = [(ENCODED_COLUMNS.index(col), col) for col in CATEGORICAL_FEATURES]
+_NUM_SLOTS = [(ENCODED_COLUMNS.index(col), col) for col in INTEGER_FEATURES + FLOAT_FEATURES]
+_ONE_HOT_SLOTS = [
+    (
+        source,
+        ENCODED_COLUMNS.index(f"{source}_{vocab[0]}"),
+        np.array(vocab, dtype=object),
+        [f"{source}_{category}" for category in vocab],
+    )
+    for source, vocab in ONE_HOT_VOCABULARIES.items()
+]
+
+
+def encode_columns(columns, out=None):
+    """Encode column arrays (dict of lists or a DataFrame) into the model's 26-column layout.
+
+    Accepts raw columns (Contract/InternetService/PaymentMethod as labels) or columns that
+    are already one-hot encoded. Unknown categories leave every one-hot slot at 0.
+    Returns an object ndarray of shape (n_rows, 26); pass `out` to reuse a buffer.
+    """
+    n_rows = len(columns[next(iter(columns))])
+    if out is None:
+        out = np.empty((n_rows, N_ENCODED), dtype=object)
+
+    for idx, col in _CAT_SLOTS:
+        out[:, idx] = np.asarray(columns[col], dtype=object)
+
+    for idx, col in _NUM_SLOTS:
+        out[:, idx] = np.asarray(columns[col], dtype=np.float64)
+
+    for source, start, vocab, dummy_columns in _ONE_HOT_SLOTS:
+        stop = start + len(vocab)
+        if source in columns:
+            values = np.asarray(columns[source], dtype=object)
+            out[:, start:stop] = (values[:, None] == vocab[None, :]).astype(np.float64)
+        else:
+            # Already encoded input, copy the dummy columns (missing ones stay at 0)
+            for offset, dummy in enumerate(dummy_columns):
+                if dummy in columns:
+                    out[:, start + offset] = np.asarray(columns[dummy], dtype=np.float64)
+                else:
+                    out[:, start + offset] = 0.0
+
+    return out
+
+
+def encode_records(records, out=None):
+    """Encode a list of raw customer dicts into the model's 26-column layout."""
+    if isinstance(records, dict):
+        records = [records]
+    columns = {key: [record[key] for record in records] for key in records[0]}
+    return encode_columns(columns, out=out)
+
+
+def to_pool(matrix):
+    """Wrap an encoded matrix in a CatBoost Pool with the model's categorical indices."""
+    from catboost import Pool
+
+    return Pool(matrix, cat_features=CAT_FEATURE_INDICES, feature_names=ENCODED_COLUMNS)
+
+
+def to_frame(matrix):
+    """Typed DataFrame view of an encoded matrix, for callers that still need column names."""
+    import pandas as pd
+
+    data = {}
+    for idx, col in enumerate(ENCODED_COLUMNS):
+        values = matrix[:, idx]
+        if col in CATEGORICAL_FEATURES:
+            data[col] = pd.Categorical(values)
+        elif col in INTEGER_FEATURES:
+            data[col] = values.astype(np.int64)
+        elif col in FLOAT_FEATURES:
+            data[col] = values.astype(np.float64)
+        else:
+            data[col] = values.astype(bool)
+    return pd.DataFrame(data, columns=ENCODED_COLUMNS)
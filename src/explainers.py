@@ -0,0 +1,107 @@
+import numpy as np
+
+from encoder import to_pool
+
+
+# Explanation backends. Both expose shap_values(features) -> (n_rows, 26) array
+EXPLAINER_BACKENDS = ('catboost', 'shap')
+
+
+class CatBoostShapExplainer:
+    """SHAP values from CatBoost's own multithreaded ShapValues engine."""
+
+    def __init__(self, model, thread_count=-1):
+        self.model = model
+        self.thread_count = thread_count
+
+    def shap_values(self, features):
+        return self.shap_values_and_expected(features)[0]
+
+    def shap_values_and_expected(self, features):
+        values = self.model.get_feature_importance(
+            to_pool(features), type='ShapValues', thread_count=self.thread_count
+        )
+        # Last column is the expected value, split off to match shap.TreeExplainer
+        return values[:, :-1], values[:, -1]
+
+
+def build_explainer(model, backend='catboost', thread_count=-1):
+    if backend == 'catboost':
+        return CatBoostShapExplainer(model, thread_count=thread_count)
+    if backend == 'shap':
+        import shap
+
+        return shap.TreeExplainer(model)
+    raise ValueError(f"Unknown explainer backend '{backend}', expected one of {EXPLAINER_BACKENDS}")
+
+
+def shap_values_and_expected(explainer, features):
+    # (n_rows, 26) SHAP values and the expected value (scalar or per row) from one explainer pass
+    if hasattr(explainer, 'shap_values_and_expected'):
+        return explainer.shap_values_and_expected(features)
+    return np.asarray(explainer.shap_values(features)), explainer.expected_value
+
+
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Rows kept for quantiles; up to this many rows they are exact, beyond it they are estimated
+# from a uniform sample (26 float32 per row, ~2 MB at the default)
+SUMMARY_SAMPLE_ROWS = 20000
+
+
+class ShapSummary:
+    """Batch-level SHAP aggregates accumulated chunk by chunk, in bounded memory.
+
+    Means are running vectorized sums. Quantiles come from a fixed-size reservoir sample of
+    rows, so memory stays the same however many rows go through; only this summary (26 values
+    per statistic) has to leave the server.
+    """
+
+    def __init__(self, feature_names, quantiles=SUMMARY_QUANTILES, sample_rows=SUMMARY_SAMPLE_ROWS, seed=0):
+        self.feature_names = list(feature_names)
+        self.quantiles = quantiles
+        self.rows = 0
+        self._abs_sum = np.zeros(len(self.feature_names))
+        self._sum = np.zeros(len(self.feature_names))
+        self._sample = np.empty((sample_rows, len(self.feature_names)), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, shap_values):
+        shap_values = np.asarray(shap_values)
+        seen = self.rows
+        self.rows += len(shap_values)
+        self._abs_sum += np.abs(shap_values).sum(axis=0)
+        self._sum += shap_values.sum(axis=0)
+
+        # Reservoir sampling (algorithm R), vectorized over the chunk
+        capacity = len(self._sample)
+        fill = max(min(capacity - seen, len(shap_values)), 0)
+        self._sample[seen:seen + fill] = shap_values[:fill]
+        rest = shap_values[fill:]
+        if len(rest):
+            positions = np.arange(seen + fill, self.rows)
+            slots = (self._rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+            keep = slots < capacity
+            self._sample[slots[keep]] = rest[keep]
+
+    def result(self):
+        rows = max(self.rows, 1)
+        summary = {
+            'rows': self.rows,
+            'feature_names': self.feature_names,
+            'mean_abs': (self._abs_sum / rows).tolist(),
+            'mean': (self._sum / rows).tolist(),
+            'quantiles': {},
+        }
+        if self.rows:
+            levels = np.quantile(self._sample[:min(self.rows, len(self._sample))], self.quantiles, axis=0)
+            summary['quantiles'] = {str(q): level.tolist() for q, level in zip(self.quantiles, levels)}
+        return summary
+
+
+def summarize_shap(shap_fn, features, feature_names, chunk_rows=10000):
+    # shap_fn(chunk) -> (len(chunk), 26) SHAP values, e.g. explainer.shap_values
+    summary = ShapSummary(feature_names)
+    for start in range(0, len(features), chunk_rows):
+        summary.update(shap_fn(features[start:start + chunk_rows]))
+    return summary.result()
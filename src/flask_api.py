@@ -1,38 +1,398 @@
-from flask import Flask, request, jsonify
-import subprocess
-from catboost import CatBoostClassifier
-import shap
-import pandas as pd
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+import os
+import json
+import time
+import threading
+import numpy as np
+from encoder import encode_columns, encode_records, ENCODED_COLUMNS
+from explainers import ShapSummary, summarize_shap
+from batching import MicroBatcher
+from cache import LRUCache, cached_rows, row_keys
+from metrics import METRICS_MIME, ROW_BUCKETS, MetricsRegistry, SamplingProfiler
+from registry import MODELS_DIR, ModelNotFoundError, ModelRegistry, ModelVersionError
+from schema import SchemaError, validate_columns
+from sweep import SWEEP_MAX_ROWS, build_sweep, sweep_result
+from wire import decode_columns, wants_arrow, arrow_response
 
 app = Flask(__name__)
 
-#Change this if run locally to # "/home/.../catboost_model.cbm"
-MODEL_PATH = "/app/models/catboost_model.cbm"  
-model = CatBoostClassifier()
-model.load_model(MODEL_PATH)
+# Every artifact in MODELS_DIR is servable by name ("catboost", "xgboost"), see registry.py.
+# Requests pick one with ?model=<name> or ?model=<name>@<version>; the default is DEFAULT_MODEL.
+DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "catboost")
 
-# SHAP explainer
-explainer = shap.TreeExplainer(model)
+# SHAP explainer for CatBoost models: "catboost" (native ShapValues) or "shap" (TreeExplainer)
+EXPLAINER_BACKEND = os.environ.get("EXPLAINER_BACKEND", "catboost")
+SHAP_THREAD_COUNT = int(os.environ.get("SHAP_THREAD_COUNT", "-1"))  # -1 uses all cores
+
+# Prediction engine for CatBoost models: "native" or "compiled" (flattened NumPy trees, used
+# for batches of at most COMPILED_MAX_ROWS rows, where it beats the CatBoost wrapper)
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "native")
+COMPILED_MAX_ROWS = int(os.environ.get("COMPILED_MAX_ROWS", "1"))
+
+# /score?shap=true derives probabilities from the SHAP values (one tree pass instead of two)
+# for models whose SHAP values are additive, see ServedModel.explain_and_score
+FUSED_SCORING = os.environ.get("FUSED_SCORING", "true").lower() in ('1', 'true', 'yes')
+
+# Seconds between checks for changed model files (0 disables; POST /models/reload always works).
+# Each gunicorn worker checks on its own, so a replaced artifact reaches all of them.
+MODEL_RELOAD_CHECK_SECONDS = float(os.environ.get("MODEL_RELOAD_CHECK_SECONDS", "0"))
+
+# Models, explainers and their heavy imports (catboost, xgboost, shap) load on first use.
+# warm_up() loads the default model up front; gunicorn does so in the master before forking.
+registry = ModelRegistry(
+    MODELS_DIR,
+    default_model=DEFAULT_MODEL,
+    explainer_backend=EXPLAINER_BACKEND,
+    thread_count=SHAP_THREAD_COUNT,
+    check_interval=MODEL_RELOAD_CHECK_SECONDS,
+    engine=INFERENCE_ENGINE,
+    compiled_max_rows=COMPILED_MAX_ROWS,
+)
+_load_seconds = {}
+
+# Representative customer used to warm the prediction path
+_WARMUP_RECORD = {
+    'gender': 'Female', 'SeniorCitizen': 0, 'Partner': 'Yes', 'Dependents': 'No', 'tenure': 12,
+    'PhoneService': 'Yes', 'MultipleLines': 'No', 'OnlineSecurity': 'No', 'OnlineBackup': 'Yes',
+    'DeviceProtection': 'No', 'TechSupport': 'No', 'StreamingTV': 'No', 'StreamingMovies': 'No',
+    'PaperlessBilling': 'Yes', 'MonthlyCharges': 70.0, 'TotalCharges': 840.0,
+    'Contract': 'Month-to-month', 'InternetService': 'Fiber optic', 'PaymentMethod': 'Electronic check',
+}
+
+
+def get_model(ref=None):
+    return registry.get(ref)
+
+
+def requested_model():
+    # Model named by the request (?model=xgboost), or the default one
+    return get_model(request.args.get('model'))
+
+
+def warm_up(ref=None):
+    # Load everything and run one prediction and explanation so the first request is fast
+    start = time.perf_counter()
+    served = get_model(ref)
+    features = encode_records([_WARMUP_RECORD])
+    served.predict_proba(features)
+    served.shap_values(features)
+    _load_seconds['warm_up'] = time.perf_counter() - start
+
+# Optional micro-batching of concurrent /predict calls (needs a threaded server to coalesce)
+PREDICT_BATCHING = os.environ.get("PREDICT_BATCHING", "false").lower() in ('1', 'true', 'yes')
+batcher = MicroBatcher(
+    lambda served, features: (MODEL_BATCH_ROWS.observe(len(features), model=served.name, call='predict'),
+                              served.predict_proba(features))[1],
+    max_batch_rows=int(os.environ.get("BATCH_MAX_ROWS", "64")),
+    max_wait_ms=float(os.environ.get("BATCH_MAX_WAIT_MS", "2")),
+) if PREDICT_BATCHING else None
+
+# Rows explained per chunk when aggregating SHAP on the server
+SUMMARY_CHUNK_ROWS = int(os.environ.get("SUMMARY_CHUNK_ROWS", "10000"))
+
+# Per-row prediction/SHAP cache keyed on the encoded row and model version (0 entries disables it)
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "100000"))
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", "3600"))
+prediction_cache = LRUCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS) if CACHE_MAX_ENTRIES > 0 else None
+# What is cached: SHAP rows by default. A probability costs about as much to compute as its
+# cache lookup, so "proba" only pays off when the same rows really do come back
+CACHE_NAMESPACES = {name.strip() for name in os.environ.get("CACHE_NAMESPACES", "shap").split(",") if name.strip()}
+
+
+# Rows failing schema validation are answered with null results and listed in the response.
+# ?invalid=reject fails the whole request (422) instead. With QUARANTINE_PATH set, invalid rows
+# and their errors are also appended there as NDJSON for later inspection.
+QUARANTINE_PATH = os.environ.get("QUARANTINE_PATH", "")
+_quarantine_lock = threading.Lock()
+
+
+# Per-process metrics, served by GET /metrics. Under gunicorn each worker keeps its own,
+# so a scrape reflects the worker that answered it.
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram('api_request_seconds', 'Request latency by endpoint', ('endpoint', 'method'))
+STAGE_SECONDS = metrics.histogram('api_stage_seconds', 'Time spent per request stage', ('endpoint', 'stage'))
+REQUEST_ROWS = metrics.histogram('api_request_rows', 'Rows per request', ('endpoint',), buckets=ROW_BUCKETS)
+MODEL_BATCH_ROWS = metrics.histogram('api_model_batch_rows', 'Rows per model call, after cache and batching',
+                                     ('model', 'call'), buckets=ROW_BUCKETS)
+IN_FLIGHT = metrics.gauge('api_requests_in_flight', 'Requests currently being handled', ('endpoint',))
+REQUESTS = metrics.counter('api_requests_total', 'Requests handled', ('endpoint', 'status'))
+ERRORS = metrics.counter('api_errors_total', 'Requests or stream chunks that failed', ('endpoint', 'status'))
+INVALID_ROWS = metrics.counter('api_invalid_rows_total', 'Input rows rejected by schema validation', ('endpoint',))
+CACHE_LOOKUPS = metrics.gauge('api_cache_lookups', 'Prediction cache lookups since start', ('result',))
+CACHE_ENTRIES = metrics.gauge('api_cache_entries', 'Rows in the prediction cache')
+COALESCED_REQUESTS = metrics.gauge('api_batcher_requests_per_batch', 'Micro-batches by number of coalesced requests', ('requests',))
+
+
+def _collect_component_stats():
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        CACHE_LOOKUPS.set(cache['hits'], result='hit')
+        CACHE_LOOKUPS.set(cache['misses'], result='miss')
+        CACHE_ENTRIES.set(cache['entries'])
+    if batcher is not None:
+        for size, count in batcher.stats()['batch_size_counts'].items():
+            COALESCED_REQUESTS.set(count, requests=size)
+
+
+metrics.add_collector(_collect_component_stats)
+
+# Sampling profiler, off until POST /debug/profiler/start
+profiler = SamplingProfiler(interval_ms=float(os.environ.get("PROFILER_INTERVAL_MS", "5")))
+
+
+def endpoint_label():
+    return request.endpoint or 'not_found'
+
+
+def stage(name):
+    # with stage('encode'): ... records the block in api_stage_seconds for this endpoint
+    return STAGE_SECONDS.time(endpoint=endpoint_label(), stage=name)
+
+
+def record_error(status=500):
+    ERRORS.inc(endpoint=endpoint_label(), status=status)
+
+
+@app.before_request
+def _start_request():
+    g.request_started = time.perf_counter()
+    IN_FLIGHT.inc(endpoint=endpoint_label())
+
+
+@app.after_request
+def _count_request(response):
+    endpoint, method = endpoint_label(), request.method
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if response.status_code >= 400:
+        record_error(response.status_code)
+
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Recorded when the server closes the response, so streamed bodies count in full
+        def finish():
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=method)
+            IN_FLIGHT.dec(endpoint=endpoint)
+
+        response.call_on_close(finish)
+    return response
+
+
+class InvalidRowsError(ValueError):
+    def __init__(self, report):
+        super().__init__(f"{len(report.invalid_rows)} of {report.n_rows} rows failed validation")
+        self.report = report
+
+
+def quarantine(report, data):
+    # Invalid rows with their input values and errors, one JSON line per row
+    messages = report.row_messages()
+    now = time.time()
+    lines = []
+    for row in report.invalid_rows.tolist():
+        values = {name: np.asarray(column[row:row + 1]).tolist()[0] for name, column in data.items()}
+        lines.append(json.dumps({'time': now, 'endpoint': endpoint_label(), 'row': row, 'values': values,
+                                 'errors': messages.get(row, "not reported (error limit reached)")},
+                                default=str) + "\n")
+    with _quarantine_lock, open(QUARANTINE_PATH, 'a') as f:
+        f.writelines(lines)
+
+
+def validated_features(data, strict=None):
+    # Schema check, then encode only the rows that passed; returns (features, report).
+    # Missing columns raise SchemaError, invalid rows raise InvalidRowsError only in strict mode.
+    if strict is None:
+        strict = request.args.get('invalid', 'skip').lower() == 'reject'
+    with stage('validate'):
+        report = validate_columns(data)
+    if not report.all_valid:
+        INVALID_ROWS.inc(len(report.invalid_rows), endpoint=endpoint_label())
+        if QUARANTINE_PATH:
+            quarantine(report, data)
+        if strict:
+            raise InvalidRowsError(report)
+    with stage('encode'):
+        features = encode_columns(report.valid_columns())
+    REQUEST_ROWS.observe(report.n_rows, endpoint=endpoint_label())
+    return features, report
+
+
+def validation_error_body(e):
+    if isinstance(e, SchemaError):
+        return {'error': str(e), 'schema_errors': e.errors}
+    return {'error': str(e), **e.report.to_dict()}
+
+
+def validation_error_response(e):
+    # 400 when the columns don't fit the schema, 422 when rows were rejected in strict mode
+    return jsonify(validation_error_body(e)), 400 if isinstance(e, SchemaError) else 422
+
+
+def model_error_response(e):
+    # 404 for a model name with no artifact, 409 for a name@version that isn't the one served
+    return jsonify({'error': str(e)}), 404 if isinstance(e, ModelNotFoundError) else 409
+
+
+def _single_row(data):
+    first = data[next(iter(data))] if hasattr(data, 'keys') else None
+    return hasattr(first, '__len__') and not isinstance(first, str) and len(first) == 1
+
+
+def report_fields(report):
+    # Validation report for a JSON response; absent when every row passed
+    return {} if report.all_valid else report.to_dict()
+
+
+def invalid_rows_header(response, report):
+    # Arrow responses carry NaN for invalid rows; the count goes in a header
+    if not report.all_valid:
+        response.headers['X-Invalid-Rows'] = str(len(report.invalid_rows))
+    return response
+
+
+def predict_probabilities(served, features):
+    if batcher is not None and len(features) < batcher.max_batch_rows:
+        # Small requests are coalesced with concurrent ones for the same model instance,
+        # large batches go straight to the model
+        return batcher.predict(served, features)
+    MODEL_BATCH_ROWS.observe(len(features), model=served.name, call='predict')
+    return served.predict_proba(features)
+
+
+def explain_rows(served, features):
+    MODEL_BATCH_ROWS.observe(len(features), model=served.name, call='shap')
+    return served.shap_values(features)
+
+
+def explain_and_score_rows(served, features):
+    MODEL_BATCH_ROWS.observe(len(features), model=served.name, call='explain_and_score')
+    return served.explain_and_score(features)
+
+
+def feature_keys(served, features, namespaces=('proba', 'shap')):
+    # Cache keys carry the model name and content version, so a reload never serves stale rows.
+    # Only computed when one of the namespaces the caller looks up is cached.
+    return row_keys(features, f"{served.name}@{served.version}") if namespace_cache(*namespaces) else None
+
+
+def namespace_cache(*namespaces):
+    # The prediction cache when it is on for any of the namespaces, else None
+    return prediction_cache if CACHE_NAMESPACES.intersection(namespaces) else None
+
+
+# Rows already in the cache skip the model
+def cached_probabilities(served, features, keys):
+    if not len(features):
+        return np.empty(0)
+    return cached_rows(namespace_cache('proba'), keys, features, lambda f: predict_probabilities(served, f), 'proba')
+
+
+def cached_shap_values(served, features, keys):
+    if not len(features):
+        return np.empty((0, len(ENCODED_COLUMNS)))
+    return cached_rows(namespace_cache('shap'), keys, features, lambda f: explain_rows(served, f), 'shap')
+
+
+def cached_scores_and_shap(served, features, keys):
+    # (probabilities, SHAP values); rows missing their SHAP values (or a cached probability,
+    # when probabilities are cached) get both from one explain_and_score call
+    if not len(features):
+        return np.empty(0), np.empty((0, len(ENCODED_COLUMNS)))
+    if not FUSED_SCORING:
+        return cached_probabilities(served, features, keys), cached_shap_values(served, features, keys)
+    cache_proba, cache_shap = namespace_cache('proba') is not None, namespace_cache('shap') is not None
+    if not (cache_proba or cache_shap):
+        return explain_and_score_rows(served, features)
+
+    proba_keys = [f"proba:{key}" for key in keys]
+    shap_keys = [f"shap:{key}" for key in keys]
+    probabilities = prediction_cache.get_many(proba_keys) if cache_proba else [None] * len(keys)
+    shap_rows = prediction_cache.get_many(shap_keys) if cache_shap else [None] * len(keys)
+    missing = [i for i in range(len(keys)) if shap_rows[i] is None or (cache_proba and probabilities[i] is None)]
+    if missing:
+        new_probabilities, new_shap = explain_and_score_rows(served, features[missing])
+        for i, probability, shap_row in zip(missing, new_probabilities, new_shap):
+            probabilities[i] = probability
+            shap_rows[i] = shap_row.copy()
+        if cache_proba:
+            prediction_cache.set_many([proba_keys[i] for i in missing], [probabilities[i] for i in missing])
+        if cache_shap:
+            prediction_cache.set_many([shap_keys[i] for i in missing], [shap_rows[i] for i in missing])
+    # SHAP cache hits without a cached probability are scored the cheap way
+    unscored = [i for i, probability in enumerate(probabilities) if probability is None]
+    if unscored:
+        for i, probability in zip(unscored, predict_probabilities(served, features[unscored])):
+            probabilities[i] = probability
+    return np.array(probabilities), np.array(shap_rows)
 
 
 @app.route('/')
 def home():
     return "Welcome to the Churn Prediction API!"
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # 200 once the model and explainer are loaded ("warm"), 503 while "cold".
+    # GET /ready?warm=true loads them before answering.
+    if request.args.get('warm', 'false').lower() in ('1', 'true', 'yes'):
+        warm_up()
+    model_loaded = registry.is_loaded()
+    explainer_loaded = model_loaded and get_model().explainer_loaded
+    warm = model_loaded and explainer_loaded
+    status = {
+        'status': 'warm' if warm else 'cold',
+        'model': DEFAULT_MODEL,
+        'model_loaded': model_loaded,
+        'explainer_loaded': explainer_loaded,
+        'model_version': get_model().version if model_loaded else None,
+        'load_seconds': {**_load_seconds, **(get_model().load_seconds if model_loaded else {})},
+    }
+    return jsonify(status), 200 if warm else 503
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    return jsonify({'default': DEFAULT_MODEL, 'models': registry.info()}), 200
+
+@app.route('/models/reload', methods=['POST'])
+def reload_models():
+    # Re-read model files from disk and swap them in; in-flight requests finish on the old model.
+    # POST /models/reload?model=xgboost reloads one model, without it every loaded model.
+    # Under gunicorn this reaches one worker, MODEL_RELOAD_CHECK_SECONDS covers the others.
+    try:
+        reloaded = registry.reload(request.args.get('model'))
+        return jsonify({'reloaded': reloaded}), 200
+    except ModelNotFoundError as e:
+        return model_error_response(e)
+    except Exception as e:
+        print(f"Error in /models/reload: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        data = request.get_json()
-        df = pd.DataFrame.from_dict(data)
+        with stage('decode'):
+            data = decode_columns(request)
+        # A single invalid customer has nothing left to score
+        features, report = validated_features(data, strict=True if data and _single_row(data) else None)
+        served = requested_model()
 
-        churn_probabilities = model.predict_proba(df)[:, 1]
+        with stage('predict'):
+            churn_probabilities = report.scatter(cached_probabilities(served, features, feature_keys(served, features, ('proba',))))
 
-        # Predictions for batch or single case
-        if len(churn_probabilities) == 1:
-            churn_probability = float(churn_probabilities[0])
-            return jsonify({'churn_probability': churn_probability}), 200
-        else:
-            return jsonify({'churn_probabilities': churn_probabilities.tolist()}), 200
+        with stage('serialize'):
+            if wants_arrow(request):
+                return invalid_rows_header(arrow_response(churn_probabilities=churn_probabilities), report)
+
+            # Predictions for batch or single case
+            if len(churn_probabilities) == 1:
+                churn_probability = float(churn_probabilities[0])
+                return jsonify({'churn_probability': churn_probability}), 200
+            else:
+                return jsonify({'churn_probabilities': report.rows_or_none(churn_probabilities),
+                                **report_fields(report)}), 200
+    except (SchemaError, InvalidRowsError) as e:
+        return validation_error_response(e)
+    except (ModelNotFoundError, ModelVersionError) as e:
+        return model_error_response(e)
     except Exception as e:
         print(f"Error in /predict: {e}")
         return jsonify({'error': str(e)}), 500
@@ -41,19 +401,227 @@ def predict():
 @app.route('/explain', methods=['POST'])
 def explain():
     try:
-        # Parse the incoming JSON data
-        data = request.json  # Expecting customer data in JSON format
-        df = pd.DataFrame.from_dict(data)
+        # Parse the incoming data (JSON by default, or Arrow IPC)
+        with stage('decode'):
+            data = decode_columns(request)
+        features, report = validated_features(data)
+        served = requested_model()
         
-        shap_values = explainer.shap_values(df) 
-        
-        return jsonify({
-            'shap_values': shap_values.tolist()
-        }), 200
+        with stage('shap'):
+            shap_values = report.scatter(cached_shap_values(served, features, feature_keys(served, features, ('shap',))))
+
+        with stage('serialize'):
+            if wants_arrow(request):
+                return invalid_rows_header(arrow_response(shap_values=shap_values), report)
+
+            return jsonify({
+                'shap_values': report.rows_or_none(shap_values),
+                **report_fields(report),
+            }), 200
+    except (SchemaError, InvalidRowsError) as e:
+        return validation_error_response(e)
+    except (ModelNotFoundError, ModelVersionError) as e:
+        return model_error_response(e)
     except Exception as e:
         print(f"Error in /explain: {e}")
         return jsonify({'error': str(e)}), 500
+
+
+@app.route('/explain/summary', methods=['POST'])
+def explain_summary():
+    # Batch-level importance (mean |SHAP|, signed mean, quantiles) without returning the N x 26 matrix
+    try:
+        with stage('decode'):
+            data = decode_columns(request)
+        features, report = validated_features(data)
+        served = requested_model()
+
+        # Over the valid rows only
+        with stage('shap'):
+            summary = summarize_shap(
+                lambda chunk: cached_shap_values(served, chunk, feature_keys(served, chunk, ('shap',))), features, ENCODED_COLUMNS,
+                chunk_rows=SUMMARY_CHUNK_ROWS,
+            )
+        with stage('serialize'):
+            return jsonify({**summary, **report_fields(report)}), 200
+    except (SchemaError, InvalidRowsError) as e:
+        return validation_error_response(e)
+    except (ModelNotFoundError, ModelVersionError) as e:
+        return model_error_response(e)
+    except Exception as e:
+        print(f"Error in /explain/summary: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/sweep', methods=['POST'])
+def sweep():
+    # What-if curves for one customer: {"customer": {...19 raw fields}, "sweeps": {"tenure":
+    # {"start": 0, "stop": 72, "num": 73}, "Contract": "all", ...}, "grid": false}.
+    # Every perturbed row is built into one matrix and scored in a single predict call.
+    try:
+        with stage('decode'):
+            body = request.get_json() or {}
+        grid = bool(body.get('grid', False))
+        with stage('build'):
+            columns, axes = build_sweep(body.get('customer') or {}, body.get('sweeps') or {}, grid=grid,
+                                        max_rows=int(os.environ.get("SWEEP_MAX_ROWS", SWEEP_MAX_ROWS)))
+        features, report = validated_features(columns, strict=True)
+        served = requested_model()
+
+        with stage('predict'):
+            churn_probabilities = predict_probabilities(served, features)
+        with stage('serialize'):
+            return jsonify(sweep_result(churn_probabilities, axes, grid=grid)), 200
+    except (SchemaError, InvalidRowsError) as e:
+        return validation_error_response(e)
+    except (ModelNotFoundError, ModelVersionError) as e:
+        return model_error_response(e)
+    except Exception as e:
+        print(f"Error in /sweep: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/stats/batching', methods=['GET'])
+def batching_stats():
+    if batcher is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **batcher.stats()}), 200
+
+
+@app.route('/stats/cache', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, 'namespaces': sorted(CACHE_NAMESPACES), **prediction_cache.stats()}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=METRICS_MIME)
+
+
+@app.route('/debug/profiler', methods=['GET'])
+def profiler_stacks():
+    # Collapsed stacks (flamegraph.pl / speedscope input), most frequent first.
+    # ?contains=flask_api.py keeps stacks through request handlers, ?limit=N the top N.
+    limit = request.args.get('limit', type=int)
+    stacks = profiler.collapsed(contains=request.args.get('contains'), limit=limit)
+    return Response(stacks, mimetype='text/plain')
+
+
+@app.route('/debug/profiler/<action>', methods=['POST'])
+def profiler_control(action):
+    # POST /debug/profiler/start[?interval_ms=5] clears previous samples and starts sampling,
+    # POST /debug/profiler/stop stops it; samples stay readable from GET /debug/profiler
+    if action == 'start':
+        profiler.start(interval_ms=request.args.get('interval_ms', type=float))
+    elif action == 'stop':
+        profiler.stop()
+    else:
+        return jsonify({'error': f"Unknown profiler action '{action}', expected start or stop"}), 400
+    return jsonify(profiler.stats()), 200
+
+
+@app.route('/score', methods=['POST'])
+def score():
+    # Decode and encode once, then score and (optionally) explain the same matrix.
+    # SHAP is opt-in: POST /score?shap=true
+    try:
+        with stage('decode'):
+            data = decode_columns(request)
+        features, report = validated_features(data)
+        with_shap = request.args.get('shap', 'false').lower() in ('1', 'true', 'yes')
+        served = requested_model()
+
+        keys = feature_keys(served, features, ('proba', 'shap') if with_shap else ('proba',))
+
+        shap_values = None
+        if with_shap:
+            with stage('shap'):
+                churn_probabilities, shap_values = cached_scores_and_shap(served, features, keys)
+            churn_probabilities, shap_values = report.scatter(churn_probabilities), report.scatter(shap_values)
+        else:
+            with stage('predict'):
+                churn_probabilities = report.scatter(cached_probabilities(served, features, keys))
+
+        with stage('serialize'):
+            if wants_arrow(request):
+                return invalid_rows_header(
+                    arrow_response(churn_probabilities=churn_probabilities, shap_values=shap_values), report)
+
+            result = {'churn_probabilities': report.rows_or_none(churn_probabilities), **report_fields(report)}
+            if with_shap:
+                result['shap_values'] = report.rows_or_none(shap_values)
+
+            return jsonify(result), 200
+    except (SchemaError, InvalidRowsError) as e:
+        return validation_error_response(e)
+    except (ModelNotFoundError, ModelVersionError) as e:
+        return model_error_response(e)
+    except Exception as e:
+        print(f"Error in /score: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/score/stream', methods=['POST'])
+def score_stream():
+    # NDJSON in, NDJSON out: each input line is one chunk of columns (same body as /score),
+    # each output line is the /score result for that chunk. Only one chunk is held at a time.
+    # ?shap=summary keeps SHAP on the server and ends the stream with one {'shap_summary': ...} line.
+    shap_mode = request.args.get('shap', 'false').lower()
+    with_shap = shap_mode in ('1', 'true', 'yes')
+    summary = ShapSummary(ENCODED_COLUMNS) if shap_mode == 'summary' else None
+    strict = request.args.get('invalid', 'skip').lower() == 'reject'
+    # Resolved once, before the response starts, so the whole stream is scored by one model
+    # version even across a reload, and an unknown model or version gets a 404/409 status
+    try:
+        served = requested_model()
+    except (ModelNotFoundError, ModelVersionError) as e:
+        body, status = model_error_response(e)
+        return Response(json.dumps(body.get_json()) + "\n", status=status, mimetype='application/x-ndjson')
+    except Exception as e:
+        print(f"Error in /score/stream: {e}")
+        return Response(json.dumps({'error': str(e)}) + "\n", status=500, mimetype='application/x-ndjson')
+
+    def generate():
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                with stage('decode'):
+                    chunk = json.loads(line)
+                features, report = validated_features(chunk, strict=strict)
+                keys = feature_keys(served, features, ('proba', 'shap') if with_shap or summary is not None else ('proba',))
+                shap_values = None
+                if with_shap or summary is not None:
+                    with stage('shap'):
+                        churn_probabilities, shap_values = cached_scores_and_shap(served, features, keys)
+                else:
+                    with stage('predict'):
+                        churn_probabilities = cached_probabilities(served, features, keys)
+                result = {'churn_probabilities': report.rows_or_none(report.scatter(churn_probabilities)),
+                          **report_fields(report)}
+                if with_shap:
+                    result['shap_values'] = report.rows_or_none(report.scatter(shap_values))
+                elif summary is not None:
+                    summary.update(shap_values)
+            except (SchemaError, InvalidRowsError) as e:
+                record_error('chunk')
+                result = validation_error_body(e)
+            except Exception as e:
+                print(f"Error in /score/stream: {e}")
+                record_error('chunk')
+                result = {'error': str(e)}
+            yield json.dumps(result) + "\n"
+        if summary is not None:
+            yield json.dumps({'shap_summary': summary.result()}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
+# Eager loading (set by gunicorn.conf.py so the model is shared by forked workers)
+if os.environ.get("API_EAGER_LOAD", "false").lower() in ('1', 'true', 'yes'):
+    warm_up()
+
 # If running locally (e.g., during development), use this:
 # if __name__ == '__main__':
 #     app.run(debug=True)  # Runs on localhost with debugging enabled
@@ -1,20 +1,13 @@
 import solara
 import pandas as pd
-from catboost import CatBoostClassifier
-import time
-import plotly.graph_objects as go
-import shap
-import matplotlib.pyplot as plt
-import io
-from PIL import Image
-import base64
-import requests
+import plotly.graph_objects as go  # submodules load lazily, on the first figure
 import numpy as np
 from utils import FileDropCSVReader
-from utils import call_api
+from utils import call_api_async, call_sweep_async
 from utils import collect_encode_ui
-from io import StringIO
-
+from utils import explain_row
+from utils import current_job, get_job_queue
+from plots import shap_bar_figure, sweep_curve_figure, sweep_heatmap_figure
 
 
 # TO DO: Improve function access to dataframe columns
@@ -52,85 +45,126 @@ payment_method = solara.reactive("Credit card (automatic)")
 
 loading = solara.reactive(False)
 prediction_message = solara.reactive("")
-file_upload_message = solara.reactive("")
 probability_value = solara.reactive(0) 
 churn_gauge = solara.reactive(None)  
 shap_values = solara.reactive(None)
-shap_values_csv = solara.reactive(None)
 show_info = solara.reactive(False)
 uploaded_file = solara.reactive(None)
-show_shap_batch_plot = solara.reactive(False)
 predictions_batch = solara.reactive(None)
 shap_values_batch = solara.reactive(None)
-transformed_df_state = solara.reactive(None)
+batch_row_index = solara.reactive(0)
+batch_row_shap = solara.reactive(None)
+batch_row_error = solara.reactive(None)
+upload_reuse_stats = solara.reactive(None)
+sweep_features = solara.reactive(["tenure", "MonthlyCharges", "Contract"])
+sweep_grid = solara.reactive(False)
+sweep_result = solara.reactive(None)
+sweep_customer = solara.reactive(None)
+
+# What-if ranges per feature, sent to /sweep (categorical features sweep every category)
+SWEEP_RANGES = {
+    'tenure': {'start': 0, 'stop': 72, 'step': 1},
+    'MonthlyCharges': {'start': 18, 'stop': 120, 'num': 52},
+    'TotalCharges': {'start': 0, 'stop': 9000, 'num': 46},
+    'SeniorCitizen': [0, 1],
+    **{feature: 'all' for feature in [
+        'Contract', 'InternetService', 'PaymentMethod', 'PaperlessBilling', 'TechSupport', 'OnlineSecurity',
+        'OnlineBackup', 'DeviceProtection', 'StreamingTV', 'StreamingMovies', 'PhoneService', 'MultipleLines',
+        'Partner', 'Dependents', 'gender']},
+}
 
 # Global variables
 df = None 
 transformed_df = None
 
 
-# Shap Bar plot for entire data predictions
+# Shap Bar plot for entire data predictions (server-side summary, see /explain/summary)
 def show_shap_batch(feats, shap_values_batch):
     if shap_values_batch.value is not None:
-        shap_values_array = np.array(shap_values_batch.value)
+        summary = shap_values_batch.value
+        mean_abs = np.array(summary["mean_abs"])
 
-        if shap_values_array.shape[1] != len(feats):
+        if len(mean_abs) != len(feats):
             print(f"Error: SHAP values and feature list have different column counts.")
             return
 
-        # Generate SHAP bar plot for the first row
-        shap_explanation = shap.Explanation(values=shap_values_array, feature_names=feats)
-
-        plt.figure(figsize=(12, 12))
-        shap.plots.bar(shap_explanation[0], show=False, max_display=15)  # First row SHAP
-        plt.xlabel("Contribution")
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        buf.seek(0)
-        plt.clf()
-
-        img_bar = Image.open(buf)
+        # Mean |SHAP| over every row of the batch
         solara.Markdown("## Feature Importance for Batch Prediction")
-        solara.Image(img_bar)
+        solara.Markdown(f"Average contribution of each feature across all {summary['rows']} customers in the file.")
+        solara.FigurePlotly(shap_bar_figure(mean_abs, feats, max_display=15, xlabel="Mean |SHAP value|"))
+
+        # Signed mean and spread of each feature's contribution, most important first
+        order = np.argsort(-mean_abs)
+        quantiles = summary.get("quantiles", {})
+        table = pd.DataFrame({
+            "Feature": [feats[i] for i in order],
+            "Mean |SHAP|": mean_abs[order],
+            "Mean SHAP": np.array(summary["mean"])[order],
+            **{f"p{float(q) * 100:g}": np.array(values)[order] for q, values in quantiles.items()},
+        })
+        solara.DataFrame(table.round(4), items_per_page=10)
     else:
         print("SHAP values are not available.")
 
 
-
-
-def make_prediction():
+# Per-row SHAP for one customer of the uploaded file, fetched only when asked for
+@solara.lab.task
+def explain_batch_row():
+    if uploaded_file.value is None:
+        return
+    values, error = explain_row(uploaded_file.value, int(batch_row_index.value))
+    batch_row_shap.value = np.array(values) if values is not None else None
+    batch_row_error.value = error
+
+
+def show_shap_batch_row(feats):
+    if batch_row_error.value:
+        solara.Error(f"Row {int(batch_row_index.value)} can't be explained: {batch_row_error.value}")
+    if batch_row_shap.value is not None:
+        solara.Markdown(f"## Feature Importance for Row {int(batch_row_index.value)}")
+        solara.FigurePlotly(shap_bar_figure(batch_row_shap.value[0], feats, max_display=15))
+
+
+
+# The customer currently entered in the sidebar, one value per raw feature
+def current_customer():
+    return {
+        'gender': gender.value,
+        'SeniorCitizen': 0,
+        'Partner': partner.value,
+        'Dependents': dependents.value,
+        'tenure': tenure.value,
+        'PhoneService': phone_service.value,
+        'MultipleLines': multiple_lines.value,
+        'OnlineSecurity': online_security.value,
+        'OnlineBackup': online_backup.value,
+        'DeviceProtection': device_protection.value,
+        'TechSupport': tech_support.value,
+        'StreamingTV': streaming_tv.value,
+        'StreamingMovies': streaming_movies.value,
+        'PaperlessBilling': paperless_billing.value,
+        'MonthlyCharges': monthly_charges.value,
+        'TotalCharges': total_charges.value,
+        'Contract': contract.value,
+        'InternetService': internet_service.value,
+        'PaymentMethod': payment_method.value,
+    }
+
+
+# Runs as a background task so the UI stays responsive during the API round trip
+@solara.lab.task
+async def make_prediction():
     global df
     loading.value = True
     show_info.set(False) 
     try:
-        data_dict = {
-            'gender': [gender.value],
-            'SeniorCitizen': [0],
-            'Partner': [partner.value],
-            'Dependents': [dependents.value],
-            'tenure': [tenure.value],
-            'PhoneService': [phone_service.value],
-            'MultipleLines': [multiple_lines.value],
-            'OnlineSecurity': [online_security.value],
-            'OnlineBackup': [online_backup.value],
-            'DeviceProtection': [device_protection.value],
-            'TechSupport': [tech_support.value],
-            'StreamingTV': [streaming_tv.value],
-            'StreamingMovies': [streaming_movies.value],
-            'PaperlessBilling': [paperless_billing.value],
-            'MonthlyCharges': [monthly_charges.value],
-            'TotalCharges': [total_charges.value],
-            'Contract': [contract.value],
-            'InternetService': [internet_service.value],
-            'PaymentMethod': [payment_method.value]
-        }
+        data_dict = {key: [value] for key, value in current_customer().items()}
         
         df = collect_encode_ui(data_dict=data_dict)  
         print(f"Collected data: {df}")
         
         # Call the API
-        churn_probability, shap_values_result = call_api(df,single_prediction=True) 
+        churn_probability, shap_values_result = await call_api_async(df, single_prediction=True) 
           
             
         if churn_probability is not None:
@@ -165,32 +199,47 @@ def show_shap():
         return
 
     if shap_values.value is not None:
-        # SHAP bar plot
-        shap_explanation = shap.Explanation(values=shap_values.value, feature_names=df.columns)
-
-        plt.figure(figsize=(12, 12)) 
-        shap.plots.bar(shap_explanation[0], show=False, max_display=15)  # Bar plot for the first observation
-        plt.xlabel("Contribution")
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')  # Use bbox_inches to prevent cutting
-        buf.seek(0)
-        plt.clf()  
-
-        img_bar = Image.open(buf)
         solara.Markdown("## Feature Importance for a Single Customer's Churn Prediction")
         solara.Markdown("This bar chart shows how different customer features (e.g., gender, contract type) contribute to the prediction of whether the customer will churn or not. Features on the right (shown in magenta) contribute positively to the model's prediction—either increasing the likelihood of the customer churning (if the prediction is 'churn') or decreasing it (if the prediction is 'no churn'). Features on the left (shown in blue) contribute negatively—either reducing the likelihood of churn or increasing it, depending on the prediction.")
-        solara.Image(img_bar)
+        # SHAP bar plot for the first observation, memoized on the values
+        solara.FigurePlotly(shap_bar_figure(shap_values.value[0], df.columns, max_display=15))
     else:
         print("SHAP values are not available.")
 
+# What-if sweep: every perturbation of the sidebar customer is scored in one /sweep call
+@solara.lab.task
+async def run_sweep():
+    customer = current_customer()
+    features = list(sweep_features.value)
+    if not features:
+        return
+    grid = sweep_grid.value and len(features) == 2
+    result = await call_sweep_async(customer, {feature: SWEEP_RANGES[feature] for feature in features}, grid=grid)
+    sweep_customer.value = customer
+    sweep_result.value = result
+
+
+def show_sweep():
+    result = sweep_result.value
+    if result is None:
+        if run_sweep.finished:
+            solara.Error("Could not run the sweep, see the API log")
+        return
+    solara.Markdown(f"Current churn probability: **{result['base_probability']:.1%}**, "
+                    f"{result['rows']:,} variations scored in one call.")
+    if 'axes' in result:
+        solara.FigurePlotly(sweep_heatmap_figure(result))
+        return
+    with solara.ColumnsResponsive(12, large=6):
+        for curve in result['curves']:
+            solara.FigurePlotly(sweep_curve_figure(curve, current=sweep_customer.value.get(curve['feature'])))
+
+
 def get_predictions_csv():
-    if predictions_batch.value is not None:
-        # DataFrame from predictions
-        df = pd.DataFrame(predictions_batch.value, columns=["Churn Prediction"])
-        output = StringIO()
-        df.to_csv(output, index=False)
-        return output.getvalue()  # Return the CSV data as a string
+    # Streamed from the finished job's stored CSV, never loaded into memory here
+    result = get_job_queue().open_result(current_job.value) if current_job.value else None
+    if result is not None:
+        return result
     return "No predictions available."
 
 
@@ -247,18 +296,34 @@ def Page():
     
     if show_info.value and shap_values.value is not None:
         show_shap()
+
+    solara.Markdown("### What-if Analysis")
+    solara.Markdown("How the churn probability of the customer above moves when one feature changes and the rest stay as entered.")
+    solara.SelectMultiple("Features to vary", values=sweep_features, all_values=list(SWEEP_RANGES))
+    solara.Checkbox(label="Vary both features together (2-D grid, needs exactly two features)", value=sweep_grid)
+    solara.Button(label="Run what-if sweep", on_click=run_sweep)
+    if run_sweep.pending:
+        solara.Info("Scoring variations...", icon="spinner")
+    show_sweep()
     
     # Render the CSV input
     solara.Markdown("### Upload CSV for Batch Predictions")
-    FileDropCSVReader(predictions_batch, shap_values_batch)  # Ensure this is rendering here
+    FileDropCSVReader(predictions_batch, shap_values_batch, uploaded_file, upload_reuse_stats)  # Ensure this is rendering here
 
-    solara.Button("Show SHAP Plot for Batch", on_click=lambda: show_shap_batch_plot.set(True))
     if predictions_batch.value is not None:
         solara.FileDownload(data=get_predictions_csv, filename="predictions_batch.csv", label="Download Predictions")
 
     if shap_values_batch.value is not None:
         show_shap_batch(fts, shap_values_batch)
 
+        # Per-row values are only downloaded on demand
+        with solara.Row():
+            solara.InputInt("Row to explain", value=batch_row_index)
+            solara.Button("Explain row", on_click=explain_batch_row)
+        if explain_batch_row.pending:
+            solara.Info("Explaining row...", icon="spinner")
+        show_shap_batch_row(fts)
+
     else:
         solara.Markdown("### No batch predictions available yet")
     
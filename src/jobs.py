@@ -0,0 +1,201 @@
+import json
+import os
+from contextlib import closing
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+
+# Job metadata (SQLite) and per-job files live here, so jobs outlive browser sessions and restarts
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(os.path.expanduser("~"), ".churn", "jobs"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Finished jobs (and their spooled input and results) are deleted once older than this,
+# or once more than JOB_MAX_KEPT newer finished jobs exist
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+JOB_MAX_KEPT = int(os.environ.get("JOB_MAX_KEPT", "200"))
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Local batch job queue: SQLite for state, a directory per job for files, worker threads.
+
+    submit() spools the input into the job directory and returns a job id right away.
+    Workers claim queued jobs in order and call `handler(input_path, output_path, progress)`,
+    where progress(rows_done, rows_total=None) records how far the job got; the handler's
+    return value (JSON-serializable) is stored as the job result. No broker is needed: jobs
+    left running by a process that died are queued again when the next one starts.
+    Each job records the session that submitted it, and finished jobs are pruned on submit.
+    """
+
+    def __init__(self, handler, jobs_dir=JOBS_DIR, workers=JOB_WORKERS,
+                 retention_seconds=JOB_RETENTION_SECONDS, max_kept=JOB_MAX_KEPT):
+        self.handler = handler
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.max_kept = max_kept
+        self.db_path = os.path.join(jobs_dir, "jobs.sqlite")
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+        os.makedirs(jobs_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, name TEXT, status TEXT NOT NULL,"
+                " input_path TEXT NOT NULL, output_path TEXT NOT NULL,"
+                " rows_done INTEGER NOT NULL DEFAULT 0, rows_total INTEGER,"
+                " result TEXT, error TEXT, worker_pid INTEGER,"
+                " created_at REAL NOT NULL, started_at REAL, finished_at REAL, owner TEXT)"
+            )
+            # Job stores created before jobs were scoped to a session
+            if 'owner' not in [row['name'] for row in conn.execute("PRAGMA table_info(jobs)")]:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start(self):
+        # Worker threads are per process, started on first use
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._requeue_orphans()
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _requeue_orphans(self):
+        with closing(self._connect()) as conn:
+            running = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+            for job in running:
+                if job['worker_pid'] is None or not _pid_alive(job['worker_pid']) or job['worker_pid'] == os.getpid():
+                    conn.execute("UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", (job['id'],))
+
+    def submit(self, file_obj, name=None, owner=None):
+        self.prune()
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, "input.csv")
+        with open(input_path, 'wb') as spool:
+            shutil.copyfileobj(file_obj, spool)
+
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, name, status, input_path, output_path, created_at, owner)"
+                " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, name, input_path, os.path.join(job_dir, "predictions.csv"), time.time(), owner),
+            )
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def prune(self, now=None):
+        # Delete finished jobs past the retention age or beyond the newest max_kept, files first
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn:
+            expired = conn.execute(
+                "SELECT id, input_path FROM jobs WHERE status IN ('done', 'failed')"
+                " AND (finished_at < ? OR id NOT IN (SELECT id FROM jobs WHERE status IN ('done', 'failed')"
+                " ORDER BY finished_at DESC LIMIT ?))",
+                (now - self.retention_seconds, self.max_kept),
+            ).fetchall()
+            for job in expired:
+                shutil.rmtree(os.path.dirname(job['input_path']), ignore_errors=True)
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job['id'],))
+        return len(expired)
+
+    def _claim(self):
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock, so two workers never claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            job = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if job is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?",
+                    (os.getpid(), time.time(), job['id']),
+                )
+            conn.execute("COMMIT")
+            return dict(job) if job is not None else None
+        finally:
+            conn.close()
+
+    def _work(self):
+        while True:
+            job = self._claim()
+            if job is None:
+                self._wake.wait(timeout=1.0)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        def progress(rows_done, rows_total=None):
+            with closing(self._connect()) as conn:
+                if rows_total is None:
+                    conn.execute("UPDATE jobs SET rows_done = ? WHERE id = ?", (rows_done, job['id']))
+                else:
+                    conn.execute("UPDATE jobs SET rows_done = ?, rows_total = ? WHERE id = ?",
+                                 (rows_done, rows_total, job['id']))
+
+        try:
+            result = self.handler(job['input_path'], job['output_path'], progress)
+        except Exception as e:
+            traceback.print_exc()
+            with closing(self._connect()) as conn:
+                conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                             (str(e), time.time(), job['id']))
+            return
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+                         (json.dumps(result), time.time(), job['id']))
+
+    def _as_dict(self, row):
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        total = job['rows_total']
+        job['progress'] = 1.0 if job['status'] == 'done' else (job['rows_done'] / total if total else 0.0)
+        return job
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._as_dict(row) if row is not None else None
+
+    def recent(self, owner, limit=10):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM jobs WHERE owner = ? ORDER BY created_at DESC LIMIT ?",
+                                (owner, limit)).fetchall()
+        return [self._as_dict(row) for row in rows]
+
+    def open_result(self, job_id):
+        # The finished job's predictions CSV as a binary file object, streamed from disk
+        job = self.get(job_id)
+        if job is None or job['status'] != 'done':
+            return None
+        return open(job['output_path'], 'rb')
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+
+# Same palette as shap.plots.bar: positive contributions magenta, negative blue
+POSITIVE_COLOR = "#ff0051"
+NEGATIVE_COLOR = "#008bfb"
+
+# Figures are memoized on a hash of the values, so re-renders with unchanged SHAP reuse them
+_FIGURE_CACHE_SIZE = 32
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+_figure_cache_stats = {'hits': 0, 'builds': 0}
+
+
+def _figure_key(values, feature_names, max_display, xlabel):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    digest.update("\x1f".join(feature_names).encode())
+    digest.update(f"{max_display}\x1f{xlabel}".encode())
+    return digest.hexdigest()
+
+
+def _build_shap_bar(values, feature_names, max_display, xlabel):
+    order = np.argsort(-np.abs(values))
+    shown = list(order[:max_display - 1]) if len(order) > max_display else list(order)
+    labels = [feature_names[i] for i in shown]
+    bars = [float(values[i]) for i in shown]
+
+    # Collapse the tail into one bar, as shap.plots.bar does
+    rest = order[len(shown):]
+    if len(rest):
+        labels.append(f"Sum of {len(rest)} other features")
+        bars.append(float(values[rest].sum()))
+
+    # Largest contribution at the top
+    labels.reverse()
+    bars.reverse()
+
+    fig = go.Figure(go.Bar(
+        x=bars,
+        y=labels,
+        orientation="h",
+        marker_color=[POSITIVE_COLOR if v >= 0 else NEGATIVE_COLOR for v in bars],
+        text=[f"{v:+.3f}" for v in bars],
+        textposition="outside",
+        cliponaxis=False,
+    ))
+    fig.update_layout(
+        xaxis_title=xlabel,
+        height=max(300, 40 * len(labels) + 100),
+        margin={"l": 10, "r": 40, "t": 20, "b": 40},
+        showlegend=False,
+    )
+    return fig
+
+
+def shap_bar_figure(values, feature_names, max_display=15, xlabel="Contribution"):
+    """Horizontal Plotly bar chart of one row of SHAP values (or any per-feature vector)."""
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    feature_names = [str(name) for name in feature_names]
+    key = _figure_key(values, feature_names, max_display, xlabel)
+
+    with _figure_cache_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+            _figure_cache_stats['hits'] += 1
+            return fig
+
+    fig = _build_shap_bar(values, feature_names, max_display, xlabel)
+
+    with _figure_cache_lock:
+        _figure_cache[key] = fig
+        _figure_cache_stats['builds'] += 1
+        while len(_figure_cache) > _FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return fig
+
+
+def figure_cache_info():
+    with _figure_cache_lock:
+        return {'entries': len(_figure_cache), 'max_entries': _FIGURE_CACHE_SIZE, **_figure_cache_stats}
+
+
+def sweep_curve_figure(curve, current=None):
+    """Churn probability along one swept feature (a /sweep curve); `current` marks the customer's value."""
+    values, probabilities = curve['values'], curve['churn_probabilities']
+    hover = f"{curve['feature']}=%{{x}}<br>churn %{{y:.1%}}<extra></extra>"
+    if any(isinstance(value, str) for value in values):
+        fig = go.Figure(go.Bar(
+            x=values,
+            y=probabilities,
+            marker_color=[POSITIVE_COLOR if value == current else NEGATIVE_COLOR for value in values],
+            hovertemplate=hover,
+        ))
+    else:
+        fig = go.Figure(go.Scatter(x=values, y=probabilities, mode="lines+markers", line_color=NEGATIVE_COLOR,
+                                   hovertemplate=hover))
+        if current is not None:
+            fig.add_vline(x=float(current), line_dash="dot", line_color=POSITIVE_COLOR)
+    fig.add_hline(y=0.5, line_dash="dash", line_color="gray")
+    fig.update_layout(
+        title=curve['feature'],
+        xaxis_title=curve['feature'],
+        yaxis={'title': "Churn probability", 'range': [0, 1], 'tickformat': ".0%"},
+        height=320,
+        margin={"l": 10, "r": 20, "t": 40, "b": 40},
+        showlegend=False,
+    )
+    return fig
+
+
+def sweep_heatmap_figure(result):
+    """Churn probability over a two-feature /sweep grid (first axis on y, second on x)."""
+    y_axis, x_axis = result['axes']
+    fig = go.Figure(go.Heatmap(
+        z=result['churn_probabilities'],
+        x=x_axis['values'],
+        y=y_axis['values'],
+        zmin=0,
+        zmax=1,
+        colorscale=[[0, NEGATIVE_COLOR], [0.5, "#f7f7f7"], [1, POSITIVE_COLOR]],
+        colorbar={'title': "Churn", 'tickformat': ".0%"},
+        hovertemplate=f"{x_axis['feature']}=%{{x}}<br>{y_axis['feature']}=%{{y}}<br>churn %{{z:.1%}}<extra></extra>",
+    ))
+    fig.update_layout(
+        xaxis_title=x_axis['feature'],
+        yaxis_title=y_axis['feature'],
+        height=420,
+        margin={"l": 10, "r": 20, "t": 20, "b": 40},
+    )
+    return fig
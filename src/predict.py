@@ -1,65 +1,171 @@
+import numpy as np
 import pandas as pd
-from catboost import CatBoostClassifier
 import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from encoder import encode_records, encode_columns, ENCODED_COLUMNS
+from registry import MODELS_DIR, ModelNotFoundError, ModelRegistry, ModelVersionError, load_served_model
+from schema import SchemaError, validate_columns
 
-MODEL_PATH = "/app/models/catboost_model.cbm"  # Path inside Docker
-model = CatBoostClassifier()
-model.load_model(MODEL_PATH)
+# Models are found the way the API finds them: by name in MODELS_DIR (default /app/models)
+DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "catboost")
+_registry = None
 
-# Encode user input
-def collect_encode_ui(user_input):
-    data = {
-        'gender': [user_input['gender']],
-        'SeniorCitizen': [user_input['SeniorCitizen']],
-        'Partner': [user_input['Partner']],
-        'Dependents': [user_input['Dependents']],
-        'tenure': [user_input['tenure']],
-        'PhoneService': [user_input['PhoneService']],
-        'MultipleLines': [user_input['MultipleLines']],
-        'OnlineSecurity': [user_input['OnlineSecurity']],
-        'OnlineBackup': [user_input['OnlineBackup']],
-        'DeviceProtection': [user_input['DeviceProtection']],
-        'TechSupport': [user_input['TechSupport']],
-        'StreamingTV': [user_input['StreamingTV']],
-        'StreamingMovies': [user_input['StreamingMovies']],
-        'PaperlessBilling': [user_input['PaperlessBilling']],
-        'MonthlyCharges': [user_input['MonthlyCharges']],
-        'TotalCharges': [user_input['TotalCharges']],
-        'Contract': [user_input['Contract']],
-        'InternetService': [user_input['InternetService']],
-        'PaymentMethod': [user_input['PaymentMethod']]
-    }
-
-    df = pd.DataFrame(data)
-
-    columns_to_encode = ['Contract', 'InternetService', 'PaymentMethod']
-    df_encoded = pd.get_dummies(df, columns=columns_to_encode, drop_first=False)
 
-    column_order = [
-        'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
-        'PhoneService', 'MultipleLines', 'OnlineSecurity', 'OnlineBackup',
-        'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
-        'PaperlessBilling', 'MonthlyCharges', 'TotalCharges',
-        'Contract_Month-to-month', 'Contract_One year', 'Contract_Two year',
-        'InternetService_DSL', 'InternetService_Fiber optic', 'InternetService_No',
-        'PaymentMethod_Bank transfer (automatic)', 'PaymentMethod_Credit card (automatic)',
-        'PaymentMethod_Electronic check', 'PaymentMethod_Mailed check'
-    ]
+# Loaded on first prediction, so `predict.py batch` and imports stay fast
+def get_model():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(MODELS_DIR, default_model=DEFAULT_MODEL)
+    return _registry.get()
 
-    df_encoded = df_encoded.reindex(columns=column_order, fill_value=0)
 
-    return df_encoded
+# Encode user input
+def collect_encode_ui(user_input):
+    return encode_records([user_input])
 
 
 def predict_churn(user_input):
     try:
         encoded_data = collect_encode_ui(user_input)
-        prediction = model.predict_proba(encoded_data)[:, 1][0]
+        prediction = get_model().predict_proba(encoded_data)[0]
         return {"Churn Probability": float(prediction)}
     except Exception as e:
         return {"error": str(e)}
 
-if __name__ == "__main__":
+
+# Batch scoring: each pool worker loads the model (and explainer) once in its initializer.
+# Any artifact the API registry serves works here (CatBoost .cbm, XGBoost .pkl/.ubj/.json).
+_worker_model = None
+_worker_with_shap = False
+
+
+def _init_worker(model_path, with_shap, explainer_backend):
+    global _worker_model, _worker_with_shap
+    # One thread per worker, the pool provides the parallelism
+    _worker_model = load_served_model(model_path, explainer_backend=explainer_backend, thread_count=1)
+    _worker_with_shap = with_shap
+    if with_shap:
+        _worker_model.explainer
+
+
+def _score_shard(shard):
+    # Blank TotalCharges in raw extracts pass validation as NaN, which CatBoost treats as missing.
+    # Rows failing validation get no probability and their errors instead of failing the shard.
+    report = validate_columns(shard)
+    features = encode_columns(report.valid_columns())
+
+    result = pd.DataFrame(index=shard.index)
+    if 'customerID' in shard.columns:
+        result['customerID'] = shard['customerID']
+    result['Churn Probability'] = report.scatter(_worker_model.predict_proba(features)) if len(features) else np.nan
+    errors = np.full(len(shard), "", dtype=object)
+    errors[report.invalid_rows] = "not reported (error limit reached)"
+    for row, message in report.row_messages().items():
+        errors[row] = message
+    result['Validation Errors'] = errors
+
+    if _worker_with_shap:
+        shap_values = report.scatter(_worker_model.shap_values(features)) if len(features) else \
+            np.full((len(shard), len(ENCODED_COLUMNS)), np.nan)
+        for idx, col in enumerate(ENCODED_COLUMNS):
+            result[f"shap_{col}"] = shap_values[:, idx]
+    return result
+
+
+def iter_shards(input_path, shard_size):
+    if input_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=shard_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=shard_size)
+
+
+class _ResultWriter:
+    # Appends scored shards to CSV or Parquet as they complete
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = output_path.endswith('.parquet')
+        self._writer = None
+        self._header = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.output_path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(input_path, output_path, workers=None, shard_size=10000, with_shap=False,
+               model_path=None, explainer_backend='catboost'):
+    # model_path defaults to the DEFAULT_MODEL artifact in MODELS_DIR
+    model_path = model_path or ModelRegistry(MODELS_DIR, default_model=DEFAULT_MODEL).artifact()
+    start = time.perf_counter()
+    rows = 0
+    workers = workers or os.cpu_count()
+    writer = _ResultWriter(output_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, with_shap, explainer_backend)) as pool:
+            # At most 2 shards per worker are read and in flight; the next shard is only read once
+            # the oldest has been written, so memory stays bounded and output keeps input order
+            shards = iter_shards(input_path, shard_size)
+            pending = deque(pool.submit(_score_shard, shard) for shard in islice(shards, 2 * workers))
+            while pending:
+                result = pending.popleft().result()
+                for shard in islice(shards, 1):
+                    pending.append(pool.submit(_score_shard, shard))
+                writer.write(result)
+                rows += len(result)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    return rows, elapsed
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(prog="predict.py batch", description="Score a CSV or Parquet file of customers")
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--shard-size", type=int, default=10000, help="Rows per shard sent to a worker")
+    parser.add_argument("--shap", action="store_true", help="Add one shap_<feature> column per model feature")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model in MODELS_DIR, as name or name@version")
+    parser.add_argument("--model-path", help="CatBoost .cbm or XGBoost .pkl/.ubj/.json artifact, instead of --model")
+    parser.add_argument("--explainer", default="catboost", choices=["catboost", "shap"])
+    args = parser.parse_args(argv)
+
+    try:
+        model_path = args.model_path or ModelRegistry(MODELS_DIR, default_model=DEFAULT_MODEL).artifact(args.model)
+    except (ModelNotFoundError, ModelVersionError) as e:
+        sys.exit(f"{e} (MODELS_DIR={MODELS_DIR})")
+    try:
+        rows, elapsed = score_file(args.input, args.output, workers=args.workers, shard_size=args.shard_size,
+                                   with_shap=args.shap, model_path=model_path, explainer_backend=args.explainer)
+    except SchemaError as e:
+        sys.exit(f"{args.input} doesn't match the model's input schema: {e}")
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec) "
+          f"with {args.workers} workers, shard size {args.shard_size} -> {args.output}")
+
+
+def interactive_main():
     customer_input = {
         "gender": input("Gender (Male/Female): ").strip(),
         "SeniorCitizen": int(input("Senior Citizen (0/1): ").strip()),
@@ -90,3 +196,12 @@ if __name__ == "__main__":
     else:
         print(f"Error: {result['error']}")
 
+
+if __name__ == "__main__":
+    # python predict.py                -> score one customer typed at the prompt
+    # python predict.py batch IN OUT   -> score a whole CSV/Parquet file
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+    else:
+        interactive_main()
+
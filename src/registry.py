@@ -0,0 +1,339 @@
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from cache import file_version
+from encoder import CATEGORICAL_FEATURES, CATEGORY_VOCABULARIES, ENCODED_COLUMNS, INTEGER_FEATURES
+from explainers import build_explainer, shap_values_and_expected
+
+
+MODELS_DIR = os.environ.get("MODELS_DIR", "/app/models")
+
+# Artifact extension -> model kind
+MODEL_KINDS = {'.cbm': 'catboost', '.pkl': 'xgboost', '.ubj': 'xgboost', '.json': 'xgboost'}
+
+
+class ModelNotFoundError(LookupError):
+    """No artifact in the models directory has the requested name."""
+
+
+class ModelVersionError(LookupError):
+    """The model is served, but not at the requested version."""
+
+
+def model_name(path):
+    # models/catboost_model.cbm -> "catboost"
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem[:-len('_model')] if stem.endswith('_model') else stem
+
+
+class ServedModel:
+    """A loaded model artifact with a uniform predict/explain interface.
+
+    predict_proba(features) returns the churn probability per row and shap_values(features)
+    an (n_rows, 26) array, for an encoded matrix from encoder.encode_columns. The explainer
+    is built on first use.
+    """
+
+    kind = None
+    # Whether SHAP values plus the expected value add up to the raw log-odds (set by _load)
+    shap_is_additive = False
+
+    def __init__(self, path, explainer_backend='catboost', thread_count=-1, engine='native', compiled_max_rows=1):
+        self.path = path
+        self.name = model_name(path)
+        self.version = file_version(path)
+        self.mtime = os.path.getmtime(path)
+        self.explainer_backend = explainer_backend
+        self.thread_count = thread_count
+        self.engine = engine
+        self.compiled_max_rows = compiled_max_rows
+        self._explainer = None
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+
+        start = time.perf_counter()
+        self.model = self._load()
+        self.load_seconds['model'] = time.perf_counter() - start
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    start = time.perf_counter()
+                    self._explainer = self._build_explainer()
+                    self.load_seconds['explainer'] = time.perf_counter() - start
+        return self._explainer
+
+    @property
+    def explainer_loaded(self):
+        return self._explainer is not None
+
+    def shap_values(self, features):
+        return self.explainer.shap_values(features)
+
+    def explain_and_score(self, features):
+        """(probabilities, SHAP values) for callers that need both.
+
+        When the SHAP values are additive, the probability is the sigmoid of their sum plus the
+        expected value, so the trees are evaluated once. Otherwise predict_proba runs as well.
+        """
+        if not self.shap_is_additive:
+            return self.predict_proba(features), self.shap_values(features)
+        values, expected = shap_values_and_expected(self.explainer, features)
+        return 1.0 / (1.0 + np.exp(-(values.sum(axis=1) + expected))), values
+
+    def info(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'kind': self.kind,
+            'path': self.path,
+            'engine': self.engine,
+            'explainer_loaded': self.explainer_loaded,
+            'fused_scoring': self.shap_is_additive,
+            'load_seconds': dict(self.load_seconds),
+        }
+
+
+class CatBoostServedModel(ServedModel):
+    kind = 'catboost'
+
+    def _load(self):
+        from catboost import CatBoostClassifier
+
+        model = CatBoostClassifier()
+        model.load_model(self.path)
+        # CatBoost's SHAP only adds up to the prediction for symmetric (oblivious) trees;
+        # for Lossguide/Depthwise models the sum is off by up to ~1 in log-odds
+        self.shap_is_additive = model.get_all_params().get('grow_policy', 'SymmetricTree') == 'SymmetricTree'
+        # engine="compiled": batches up to compiled_max_rows skip the CatBoost wrapper and
+        # run on the flattened NumPy trees (compiled.py), larger ones stay on CatBoost
+        self.compiled = None
+        if self.engine == 'compiled':
+            from compiled import CompiledTrees
+
+            self.compiled = CompiledTrees.from_catboost(model)
+        return model
+
+    def _build_explainer(self):
+        return build_explainer(self.model, backend=self.explainer_backend, thread_count=self.thread_count)
+
+    def predict_proba(self, features):
+        if self.compiled is not None and len(features) <= self.compiled_max_rows:
+            return self.compiled.predict_proba(features)
+        return self.model.predict_proba(features, thread_count=self.thread_count)[:, 1]
+
+
+class XGBoostShapExplainer:
+    """SHAP values from XGBoost's native TreeSHAP (pred_contribs)."""
+
+    def __init__(self, served):
+        self.served = served
+
+    def shap_values(self, features):
+        return self.shap_values_and_expected(features)[0]
+
+    def shap_values_and_expected(self, features):
+        contribs = self.served.model.predict(self.served.dmatrix(features), pred_contribs=True)
+        # Last column is the bias term, split off to match the (n, 26) layout
+        return contribs[:, :-1], contribs[:, -1]
+
+
+class XGBoostServedModel(ServedModel):
+    kind = 'xgboost'
+
+    def _load(self):
+        import xgboost as xgb
+
+        if self.path.endswith('.pkl'):
+            with open(self.path, 'rb') as f:
+                model = pickle.load(f)
+            # Pickled sklearn wrapper or raw Booster
+            model = model.get_booster() if hasattr(model, 'get_booster') else model
+        else:
+            model = xgb.Booster(model_file=self.path)
+        # pred_contribs sums to the margin exactly; the probability is its sigmoid for logistic models
+        objective = json.loads(model.save_config())['learner']['objective']['name']
+        self.shap_is_additive = objective == 'binary:logistic'
+        return model
+
+    def _build_explainer(self):
+        return XGBoostShapExplainer(self)
+
+    def dmatrix(self, features):
+        import pandas as pd
+        import xgboost as xgb
+
+        # XGBoost reads categoricals by code, so the category sets must be the training ones
+        data = {}
+        for idx, col in enumerate(ENCODED_COLUMNS):
+            values = features[:, idx]
+            if col in CATEGORICAL_FEATURES:
+                data[col] = pd.Categorical(values, categories=CATEGORY_VOCABULARIES[col])
+            elif col in INTEGER_FEATURES:
+                data[col] = values.astype(np.int64)
+            else:
+                data[col] = values.astype(np.float64)
+        nthread = -1 if self.thread_count is None else self.thread_count
+        return xgb.DMatrix(pd.DataFrame(data, columns=ENCODED_COLUMNS), enable_categorical=True, nthread=nthread)
+
+    def predict_proba(self, features):
+        return self.model.predict(self.dmatrix(features))
+
+
+SERVED_MODEL_TYPES = {'catboost': CatBoostServedModel, 'xgboost': XGBoostServedModel}
+
+
+# Inference engines: "native" (the model's own library) or "compiled" (CatBoost only, see compiled.py)
+INFERENCE_ENGINES = ('native', 'compiled')
+
+
+def load_served_model(path, explainer_backend='catboost', thread_count=-1, engine='native', compiled_max_rows=1):
+    kind = MODEL_KINDS.get(os.path.splitext(path)[1])
+    if kind is None:
+        raise ValueError(f"Unsupported model artifact '{path}', expected one of {sorted(MODEL_KINDS)}")
+    if engine not in INFERENCE_ENGINES:
+        raise ValueError(f"Unknown inference engine '{engine}', expected one of {INFERENCE_ENGINES}")
+    if kind != 'catboost':
+        engine = 'native'
+    return SERVED_MODEL_TYPES[kind](path, explainer_backend=explainer_backend, thread_count=thread_count,
+                                    engine=engine, compiled_max_rows=compiled_max_rows)
+
+
+class ModelRegistry:
+    """Models in `models_dir`, loaded lazily by name and swapped atomically on reload.
+
+    Requests refer to a model as "name" or "name@version" (version = content hash prefix).
+    A reload builds the new model completely before replacing the reference, so requests
+    already holding the previous one finish on it.
+    """
+
+    def __init__(self, models_dir=MODELS_DIR, default_model='catboost', explainer_backend='catboost',
+                 thread_count=-1, check_interval=0.0, engine='native', compiled_max_rows=1):
+        self.models_dir = models_dir
+        self.default_model = default_model
+        self.explainer_backend = explainer_backend
+        self.thread_count = thread_count
+        self.check_interval = check_interval  # seconds between artifact change checks, 0 = off
+        self.engine = engine
+        self.compiled_max_rows = compiled_max_rows
+        self._models = {}
+        self._lock = threading.Lock()  # guards swapping references, never held while loading
+        self._reload_lock = threading.Lock()  # one reload (explicit or file-triggered) at a time
+        self._last_check = time.monotonic()
+
+    def available(self):
+        found = {}
+        for filename in sorted(os.listdir(self.models_dir)):
+            if os.path.splitext(filename)[1] in MODEL_KINDS:
+                found[model_name(filename)] = os.path.join(self.models_dir, filename)
+        return found
+
+    def artifact(self, ref=None):
+        # Path of the artifact a "name" or "name@version" ref points at, without loading it
+        name, _, version = (ref or self.default_model).partition('@')
+        paths = self.available()
+        if name not in paths:
+            raise ModelNotFoundError(f"Unknown model '{name}', available: {sorted(paths)}")
+        current = file_version(paths[name])
+        if version and not current.startswith(version):
+            raise ModelVersionError(f"Model '{name}' is at version {current}, not {version}")
+        return paths[name]
+
+    def _load(self, name):
+        paths = self.available()
+        if name not in paths:
+            raise ModelNotFoundError(f"Unknown model '{name}', available: {sorted(paths)}")
+        return load_served_model(paths[name], explainer_backend=self.explainer_backend,
+                                 thread_count=self.thread_count, engine=self.engine,
+                                 compiled_max_rows=self.compiled_max_rows)
+
+    def get(self, ref=None):
+        name, _, version = (ref or self.default_model).partition('@')
+        self._maybe_refresh()
+
+        served = self._models.get(name)
+        if served is None:
+            with self._lock:
+                served = self._models.get(name)
+                if served is None:
+                    served = self._load(name)
+                    self._models[name] = served
+
+        if version and not served.version.startswith(version):
+            raise ModelVersionError(f"Model '{name}' is at version {served.version}, not {version}")
+        return served
+
+    def is_loaded(self, name=None):
+        return (name or self.default_model) in self._models
+
+    def reload(self, name=None):
+        with self._reload_lock:
+            return self._reload(name)
+
+    def _reload(self, name=None):
+        # Load outside the swap lock, then swap the reference
+        names = [name] if name else list(self._models) or [self.default_model]
+        reloaded = {}
+        for model in names:
+            served = self._load(model)
+            if self._models.get(model) is not None and self._models[model].explainer_loaded:
+                served.explainer  # keep the swapped-in model as warm as the old one
+            reloaded[model] = served
+        with self._lock:
+            self._models.update(reloaded)
+        return [served.info() for served in reloaded.values()]
+
+    def _maybe_refresh(self):
+        # Cheap check on the request path; changed artifacts are reloaded on a background thread
+        if self.check_interval <= 0 or time.monotonic() - self._last_check < self.check_interval:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return  # a reload is already running, keep serving the current models
+        if time.monotonic() - self._last_check < self.check_interval:
+            self._reload_lock.release()  # another request ran the check meanwhile
+            return
+        self._last_check = time.monotonic()
+        threading.Thread(target=self._refresh_changed, name="model-refresh", daemon=True).start()
+
+    def _refresh_changed(self):
+        # Runs holding _reload_lock, acquired by _maybe_refresh
+        try:
+            for name, served in list(self._models.items()):
+                try:
+                    mtime = os.path.getmtime(served.path)
+                    if mtime == served.mtime:
+                        continue
+                    if file_version(served.path) == served.version:
+                        served.mtime = mtime  # touched, not changed
+                        continue
+                except OSError:
+                    continue
+                print(f"Model artifact {served.path} changed, reloading '{name}'")
+                try:
+                    self._reload(name)
+                except Exception as e:
+                    # A half-written or broken artifact: keep serving the loaded model, retry next check
+                    print(f"Error reloading model '{name}', still serving version {served.version}: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def info(self):
+        loaded = dict(self._models)
+        models = []
+        for name, path in self.available().items():
+            if name in loaded:
+                entry = loaded[name].info()
+            else:
+                entry = {'name': name, 'path': path, 'kind': MODEL_KINDS[os.path.splitext(path)[1]],
+                         'version': file_version(path)}
+            entry['loaded'] = name in loaded
+            entry['default'] = name == self.default_model
+            models.append(entry)
+        return models
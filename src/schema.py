@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+
+from encoder import (
+    CATEGORICAL_FEATURES, CATEGORY_VOCABULARIES, ENCODED_COLUMNS, FLOAT_FEATURES, INTEGER_FEATURES,
+    ONE_HOT_VOCABULARIES, RAW_FEATURES,
+)
+
+
+# Row-level errors listed in a report; the total count is always exact
+MAX_REPORTED_ERRORS = 1000
+
+
+class SchemaError(ValueError):
+    """The request as a whole doesn't fit the schema (missing columns, ragged lengths)."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+    def __reduce__(self):
+        # Rebuilt from the error list when it crosses a process pool, not from the joined message
+        return SchemaError, (self.errors,)
+
+
+class FieldSpec:
+    """One input column: a category set, or a numeric kind with bounds."""
+
+    def __init__(self, name, kind, categories=None, minimum=None, maximum=None, nullable=False):
+        self.name = name
+        self.kind = kind  # 'category', 'integer', 'float' or 'flag' (one-hot 0/1)
+        self.categories = np.array(categories, dtype=object) if categories is not None else None
+        self.minimum = minimum
+        self.maximum = maximum
+        self.nullable = nullable
+
+
+def _raw_fields():
+    fields = {}
+    for col in CATEGORICAL_FEATURES:
+        fields[col] = FieldSpec(col, 'category', CATEGORY_VOCABULARIES[col])
+    for col, vocab in ONE_HOT_VOCABULARIES.items():
+        fields[col] = FieldSpec(col, 'category', vocab)
+    fields['SeniorCitizen'] = FieldSpec('SeniorCitizen', 'integer', minimum=0, maximum=1)
+    fields['tenure'] = FieldSpec('tenure', 'integer', minimum=0)
+    fields['MonthlyCharges'] = FieldSpec('MonthlyCharges', 'float', minimum=0)
+    # Blank for brand-new customers in the raw extract; the model treats missing as lowest
+    fields['TotalCharges'] = FieldSpec('TotalCharges', 'float', minimum=0, nullable=True)
+    assert set(fields) == set(RAW_FEATURES) and set(INTEGER_FEATURES + FLOAT_FEATURES) <= set(fields)
+    return fields
+
+
+class ValidationReport:
+    def __init__(self, n_rows, valid, columns, errors, error_count):
+        self.n_rows = n_rows
+        self.valid = valid  # bool mask over rows
+        self.columns = columns  # input columns with numerics coerced to float
+        self.errors = errors  # [{'row', 'column', 'error', 'value'}], at most MAX_REPORTED_ERRORS
+        self.error_count = error_count
+
+    @property
+    def all_valid(self):
+        return self.error_count == 0
+
+    @property
+    def invalid_rows(self):
+        return np.flatnonzero(~self.valid)
+
+    def valid_columns(self):
+        if self.all_valid:
+            return self.columns
+        return {name: values[self.valid] for name, values in self.columns.items()}
+
+    def scatter(self, values):
+        # Results for the valid rows -> one entry per input row, NaN for invalid rows
+        if self.all_valid:
+            return values
+        values = np.asarray(values, dtype=np.float64)
+        out = np.full((self.n_rows,) + values.shape[1:], np.nan)
+        out[self.valid] = values
+        return out
+
+    def rows_or_none(self, values):
+        # JSON form of scattered results: invalid rows become null
+        rows = values.tolist()
+        if self.all_valid:
+            return rows
+        return [row if ok else None for ok, row in zip(self.valid.tolist(), rows)]
+
+    def row_messages(self):
+        # {row: "column error; ..."} for the reported errors, used for quarantine files
+        messages = {}
+        for error in self.errors:
+            messages.setdefault(error['row'], []).append(f"{error['column']} {error['error']}")
+        return {row: "; ".join(parts) for row, parts in messages.items()}
+
+    def to_dict(self):
+        return {
+            'invalid_rows': int((~self.valid).sum()),
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+class CompiledSchema:
+    """Schema of the 19 raw and 26 encoded features, checked a whole column at a time.
+
+    Input may be raw (Contract/InternetService/PaymentMethod as labels) or already one-hot
+    encoded, as encoder.encode_columns accepts. Each check is a vectorized comparison over
+    the column; Python only touches the (capped) list of reported errors.
+    """
+
+    def __init__(self):
+        self.raw_fields = _raw_fields()
+        self.one_hot_groups = {
+            source: [f"{source}_{category}" for category in vocab]
+            for source, vocab in ONE_HOT_VOCABULARIES.items()
+        }
+        self.flag_fields = {
+            dummy: FieldSpec(dummy, 'flag', minimum=0, maximum=1)
+            for dummies in self.one_hot_groups.values() for dummy in dummies
+        }
+        assert set(self.flag_fields) | (set(self.raw_fields) - set(self.one_hot_groups)) == set(ENCODED_COLUMNS)
+
+    def _expected_fields(self, columns):
+        # Raw label column per one-hot group when present, its dummy columns otherwise
+        fields, missing = [], []
+        for name, spec in self.raw_fields.items():
+            if name in self.one_hot_groups and name not in columns:
+                dummies = self.one_hot_groups[name]
+                absent = [dummy for dummy in dummies if dummy not in columns]
+                if absent:
+                    missing.append(name if len(absent) == len(dummies) else ", ".join(absent))
+                fields.extend(self.flag_fields[dummy] for dummy in dummies)
+            elif name not in columns:
+                missing.append(name)
+            else:
+                fields.append(spec)
+        return fields, missing
+
+    def validate(self, columns):
+        if not hasattr(columns, 'keys') or not len(columns):
+            raise SchemaError(["Expected an object of columns (column name -> list of values)"])
+
+        fields, missing = self._expected_fields(columns)
+        if missing:
+            raise SchemaError([f"Missing column: {name}" for name in missing])
+
+        scalars = [spec.name for spec in fields if not _is_sequence(columns[spec.name])]
+        if len(scalars) == len(fields):
+            raise SchemaError(["Expected a list of values per column, got single values "
+                               "(wrap each value in a list to send one row)"])
+        if scalars:
+            raise SchemaError([f"Column {name} must be a list of values, one per row" for name in scalars])
+
+        lengths = {spec.name: len(columns[spec.name]) for spec in fields}
+        n_rows = max(lengths.values())
+        ragged = [name for name, length in lengths.items() if length != n_rows]
+        if ragged:
+            raise SchemaError([f"Column {name} has {lengths[name]} values, expected {n_rows}" for name in ragged])
+
+        valid = np.ones(n_rows, dtype=bool)
+        cleaned = {}
+        problems = []  # (bad mask, column, message, values)
+        for spec in fields:
+            if spec.kind == 'category':
+                values = np.asarray(columns[spec.name], dtype=object)
+                bad = ~np.isin(values, spec.categories)
+                problems.append((bad, spec.name, f"must be one of {spec.categories.tolist()}", values))
+                cleaned[spec.name] = values
+            else:
+                try:
+                    values = np.asarray(columns[spec.name])
+                except ValueError:
+                    # Nested values in a list column: keep them as objects, they fail as non-numbers
+                    values = np.asarray(columns[spec.name], dtype=object)
+                numbers, bad_masks = self._check_numeric(spec, values)
+                problems.extend((mask, spec.name, message, values) for mask, message in bad_masks)
+                cleaned[spec.name] = numbers
+
+        # Already encoded input: exactly one dummy set per one-hot group
+        for source, dummies in self.one_hot_groups.items():
+            if source not in columns:
+                hot = np.sum([np.nan_to_num(cleaned[dummy]) for dummy in dummies], axis=0)
+                problems.append((hot != 1, ",".join(dummies), f"exactly one {source} column must be 1", None))
+
+        errors, error_count = [], 0
+        for bad, column, message, values in problems:
+            count = int(bad.sum())
+            if not count:
+                continue
+            valid &= ~bad
+            error_count += count
+            for row in np.flatnonzero(bad)[:max(MAX_REPORTED_ERRORS - len(errors), 0)]:
+                value = _json_value(values[row]) if values is not None else None
+                errors.append({'row': int(row), 'column': column, 'error': message, 'value': value})
+
+        errors.sort(key=lambda error: error['row'])
+        return ValidationReport(n_rows, valid, cleaned, errors, error_count)
+
+    def _check_numeric(self, spec, values):
+        if values.dtype.kind in 'biuf':
+            # Numeric arrays (Arrow, JSON lists of numbers): only NaN can be missing
+            numbers = values.astype(np.float64, copy=False)
+            blank = np.isnan(numbers)
+            problems = []
+        else:
+            # Mixed or text values: blank strings and None are missing, anything else must parse
+            series = pd.Series(values, dtype=object)
+            blank = series.isna().to_numpy() | (series.astype(str).str.strip() == '').to_numpy()
+            numbers = pd.to_numeric(series.where(~blank), errors='coerce').to_numpy(dtype=np.float64)
+            problems = [(~blank & np.isnan(numbers), "must be a number")]
+        if not spec.nullable:
+            problems.append((blank, "is required"))
+        present = ~np.isnan(numbers)
+        if spec.kind in ('integer', 'flag'):
+            problems.append((present & (np.mod(np.where(present, numbers, 0), 1) != 0), "must be a whole number"))
+        if spec.minimum is not None:
+            problems.append((present & (np.where(present, numbers, spec.minimum) < spec.minimum),
+                             f"must be >= {spec.minimum}"))
+        if spec.maximum is not None:
+            problems.append((present & (np.where(present, numbers, spec.maximum) > spec.maximum),
+                             f"must be <= {spec.maximum}"))
+        return numbers, problems
+
+
+def _is_sequence(values):
+    # A column is a flat list, a 1-D array or a Series; nested lists past the first value
+    # are left to the per-value checks
+    if isinstance(values, (list, tuple)):
+        return not values or not isinstance(values[0], (list, tuple, dict))
+    return getattr(values, 'ndim', None) == 1
+
+
+def _json_value(value):
+    # Offending value as it can appear in a JSON report (NaN -> null, NumPy scalars -> Python)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+SCHEMA = CompiledSchema()
+
+
+def validate_columns(columns):
+    return SCHEMA.validate(columns)
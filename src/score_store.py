@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+
+# Columns of an upload that don't feed the model and so don't count as row content
+NON_FEATURE_COLUMNS = ('customerID', 'Churn')
+
+# Where previous upload results are kept; an empty SCORE_STORE_PATH disables reuse
+SCORE_STORE_PATH = os.environ.get(
+    "SCORE_STORE_PATH", os.path.join(os.path.expanduser("~"), ".churn", "score_store.sqlite"))
+
+# SQLite host parameter limit is 999 on older builds
+_LOOKUP_BATCH = 900
+
+
+def row_fingerprints(df):
+    """(keys, content hashes) per raw upload row.
+
+    The key is the customerID when the file has one, otherwise the content hash itself.
+    Content is hashed on the string form of the feature columns, so a column read as text
+    in one chunk and as numbers in another (blank TotalCharges) hashes the same.
+    """
+    content_columns = [col for col in df.columns if col not in NON_FEATURE_COLUMNS]
+    hashes = pd.util.hash_pandas_object(df[content_columns].astype(str), index=False).to_numpy()
+    content = [f"{value:016x}" for value in hashes]
+    if 'customerID' in df.columns:
+        keys = df['customerID'].astype(str).tolist()
+    else:
+        keys = content
+    return keys, content
+
+
+class ScoreStore:
+    """Per-row scores and SHAP values from previous uploads, in a local SQLite file.
+
+    Entries are tied to the model version that produced them; rows are reused only when
+    both the key and the content hash match under the current version.
+    """
+
+    def __init__(self, path=SCORE_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                " row_key TEXT NOT NULL, model_version TEXT NOT NULL, content_hash TEXT NOT NULL,"
+                " probability REAL NOT NULL, shap BLOB, updated_at REAL NOT NULL,"
+                " PRIMARY KEY (row_key, model_version))"
+            )
+
+    def _connect(self):
+        # One connection per call: uploads are scored from Solara worker threads.
+        # Callers wrap it in closing(), the inner `with conn` only commits.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, keys, hashes, model_version, n_features):
+        """-> (hit mask, probabilities, SHAP matrix); values are only meaningful where hit."""
+        found = {}
+        with closing(self._connect()) as conn, conn:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), _LOOKUP_BATCH):
+                batch = unique_keys[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT row_key, content_hash, probability, shap FROM scores"
+                    f" WHERE model_version = ? AND row_key IN ({placeholders})",
+                    [model_version, *batch],
+                )
+                for row_key, content_hash, probability, shap in rows:
+                    found[row_key] = (content_hash, probability, shap)
+
+        hit = np.zeros(len(keys), dtype=bool)
+        probabilities = np.full(len(keys), np.nan)
+        shap_values = np.full((len(keys), n_features), np.nan)
+        for i, (key, content_hash) in enumerate(zip(keys, hashes)):
+            entry = found.get(key)
+            if entry is None or entry[0] != content_hash or entry[2] is None:
+                continue
+            hit[i] = True
+            probabilities[i] = entry[1]
+            shap_values[i] = np.frombuffer(entry[2], dtype=np.float64)
+        return hit, probabilities, shap_values
+
+    def store(self, keys, hashes, model_version, probabilities, shap_values):
+        now = time.time()
+        rows = [
+            (key, model_version, content_hash, float(probability),
+             np.ascontiguousarray(shap, dtype=np.float64).tobytes(), now)
+            for key, content_hash, probability, shap in zip(keys, hashes, probabilities, shap_values)
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def drop_other_versions(self, model_version):
+        # Results of older versions of the same model ("name@version") can never be reused again;
+        # other models' rows stay. substr rather than LIKE, as '_' in a name is a LIKE wildcard.
+        prefix = model_version.partition('@')[0] + '@'
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM scores WHERE substr(model_version, 1, ?) = ? AND model_version != ?",
+                         (len(prefix), prefix, model_version))
+
+    def count(self, model_version=None):
+        with closing(self._connect()) as conn, conn:
+            if model_version is None:
+                return conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM scores WHERE model_version = ?",
+                                (model_version,)).fetchone()[0]
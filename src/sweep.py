@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+from encoder import RAW_FEATURES
+from schema import SCHEMA, SchemaError
+
+
+# Largest perturbation matrix one sweep may build
+SWEEP_MAX_ROWS = 100000
+
+
+def sweep_values(feature, spec, max_values=SWEEP_MAX_ROWS):
+    """Values a feature is swept over.
+
+    `spec` is an explicit list, {"start", "stop", "num"} (evenly spaced, ends included),
+    {"start", "stop", "step"}, or "all" for every category of a categorical feature.
+    Integer features are rounded and deduplicated. The number of values is worked out from
+    the spec and checked against `max_values` before anything is allocated.
+    """
+    field = SCHEMA.raw_fields.get(feature)
+    if field is None:
+        raise SchemaError([f"Unknown feature to sweep: {feature}"])
+
+    if spec == 'all':
+        if field.kind != 'category':
+            raise SchemaError([f"'all' only applies to categorical features, not {feature}"])
+        return field.categories.copy()
+    if isinstance(spec, dict):
+        if field.kind == 'category':
+            raise SchemaError([f"{feature} is categorical, sweep it over a list of categories or 'all'"])
+        try:
+            start, stop = float(spec['start']), float(spec['stop'])
+            if 'step' in spec:
+                step = float(spec['step'])
+                count = int(np.floor((stop - start) / step + 1e-9)) + 1 if step > 0 and stop >= start else 0
+            else:
+                step = None
+                count = int(spec.get('num', 50))
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            raise SchemaError([f"Bad range for {feature}: {e}"])
+        if count < 0:
+            raise SchemaError([f"Bad range for {feature}: num must not be negative"])
+        _check_count(feature, count, max_values)
+        values = start + step * np.arange(count) if step is not None else np.linspace(start, stop, count)
+        if field.kind == 'integer':
+            values = np.unique(np.round(values))
+        return values
+    if isinstance(spec, (list, tuple)):
+        _check_count(feature, len(spec), max_values)
+        if field.kind == 'category':
+            return np.array(spec, dtype=object)
+        try:
+            values = np.array(spec, dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            raise SchemaError([f"Bad values for {feature}: {e}"])
+        if values.ndim != 1:
+            raise SchemaError([f"Bad values for {feature}: expected a flat list of numbers"])
+        return values
+    raise SchemaError([f"Bad sweep for {feature}: expected a list, a range object or 'all'"])
+
+
+def _check_count(feature, count, max_values):
+    if count > max_values:
+        raise SchemaError([f"Sweep of {feature} has {count} values, the limit is {max_values}"])
+
+
+def build_sweep(customer, sweeps, grid=False, max_rows=SWEEP_MAX_ROWS):
+    """Columns of the perturbation rows for one customer, ready for validation and encoding.
+
+    Row 0 is the customer as given. With grid=False each swept feature gets its own block of
+    rows (one response curve per feature, the others held at the customer's values); with
+    grid=True the rows are the full product of all swept values, in C order of the axes.
+    Returns (columns, axes) where axes is [(feature, values), ...].
+    """
+    missing = [feature for feature in RAW_FEATURES if feature not in customer]
+    if missing:
+        raise SchemaError([f"Missing customer field: {feature}" for feature in missing])
+    if not sweeps:
+        raise SchemaError(["Nothing to sweep: give at least one feature"])
+
+    # Each axis is capped on its own before it is built, the rows of all axes together before
+    # any column is allocated
+    axes = [(feature, sweep_values(feature, spec, max_rows)) for feature, spec in sweeps.items()]
+    empty = [feature for feature, values in axes if not len(values)]
+    if empty:
+        raise SchemaError([f"Empty sweep for {feature}" for feature in empty])
+
+    sizes = [len(values) for _, values in axes]
+    n_rows = 1 + (math.prod(sizes) if grid else sum(sizes))
+    if n_rows > max_rows:
+        raise SchemaError([f"Sweep needs {n_rows} rows, the limit is {max_rows}"])
+
+    # Every row starts as the customer, swept columns are then overwritten in place
+    columns = {}
+    for feature in RAW_FEATURES:
+        value = customer[feature]
+        dtype = object if isinstance(value, str) or value is None else np.float64
+        columns[feature] = np.full(n_rows, value, dtype=dtype)
+
+    if grid:
+        positions = np.unravel_index(np.arange(n_rows - 1), sizes)
+        for (feature, values), index in zip(axes, positions):
+            columns[feature] = _with_values(columns[feature], values, 1, values[index])
+    else:
+        start = 1
+        for feature, values in axes:
+            columns[feature] = _with_values(columns[feature], values, start, values)
+            start += len(values)
+    return columns, axes
+
+
+def _with_values(column, values, start, block):
+    # Writing strings into a numeric column (or numbers into text) needs an object column
+    if column.dtype != values.dtype and column.dtype != object:
+        column = column.astype(object)
+    column[start:start + len(block)] = block
+    return column
+
+
+def sweep_result(probabilities, axes, grid=False):
+    """JSON-ready curves (or grid) from the probabilities of the build_sweep rows."""
+    result = {'base_probability': float(probabilities[0]), 'rows': len(probabilities)}
+    if grid:
+        sizes = [len(values) for _, values in axes]
+        result['axes'] = [{'feature': feature, 'values': values.tolist()} for feature, values in axes]
+        result['churn_probabilities'] = probabilities[1:].reshape(sizes).tolist()
+        return result
+
+    curves = []
+    start = 1
+    for feature, values in axes:
+        curves.append({
+            'feature': feature,
+            'values': values.tolist(),
+            'churn_probabilities': probabilities[start:start + len(values)].tolist(),
+        })
+        start += len(values)
+    result['curves'] = curves
+    return result
@@ -1,8 +1,76 @@
 import solara
 import pandas as pd
+import numpy as np
 from io import BytesIO
 from solara.components.file_drop import FileInfo
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
+import json
+import os
+import time
+from encoder import ENCODED_COLUMNS, encode_columns, to_frame
+from explainers import ShapSummary
+from jobs import JobQueue
+from schema import SchemaError, validate_columns
+from score_store import SCORE_STORE_PATH, ScoreStore, row_fingerprints
+from wire import ARROW_MIME, frame_arrow_bytes, read_arrow_response
+
+# Rows per chunk when streaming uploaded CSVs through the API
+STREAM_CHUNK_SIZE = 5000
+
+API_URL = os.environ.get("CHURN_API_URL", "http://127.0.0.1:5000")
+
+
+class APIClient:
+    """Keep-alive, connection-pooled client for the churn API with timeouts and retries.
+
+    Retries resend the request body, so they only apply to bodies that can be replayed.
+    Streamed uploads (a generator body) go through post_stream(), which never retries.
+    """
+
+    def __init__(self, base_url=API_URL, timeout=(3.05, 120), retries=3, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout  # (connect, read) seconds
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'POST'}),  # scoring calls are idempotent, bodies are bytes
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        stream_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.stream_session = requests.Session()
+        self.stream_session.mount('http://', stream_adapter)
+        self.stream_session.mount('https://', stream_adapter)
+
+    def post(self, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.post(f"{self.base_url}{path}", **kwargs)
+
+    def post_stream(self, path, **kwargs):
+        # A one-shot body can't be resent: a retry would post an empty stream
+        kwargs.setdefault('timeout', self.timeout)
+        return self.stream_session.post(f"{self.base_url}{path}", **kwargs)
+
+    def get(self, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(f"{self.base_url}{path}", **kwargs)
+
+    # Async variants run the blocking call in a worker thread so the event loop stays free
+    async def apost(self, path, **kwargs):
+        return await asyncio.to_thread(self.post, path, **kwargs)
+
+    async def aget(self, path, **kwargs):
+        return await asyncio.to_thread(self.get, path, **kwargs)
+
+
+api_client = APIClient()
 
 
 # Function to load a CSV into a general DataFrame
@@ -11,122 +79,398 @@ def load_df(data: BytesIO) -> pd.DataFrame:
     return new_df
 
 
+# Generator over a CSV in fixed-size DataFrame chunks, never holding the whole file
+def iter_csv_chunks(data, chunk_size=STREAM_CHUNK_SIZE):
+    for chunk in pd.read_csv(data, chunksize=chunk_size):
+        yield chunk
+
 
-def call_api(df, single_prediction=False):
-    data_json = df.to_dict(orient='list')
 
-    # API endpoints
-    predict_url = "http://127.0.0.1:5000/predict"
-    explain_url = "http://127.0.0.1:5000/explain"
+def _score_request(df, explain, binary, model=None):
+    # Keyword arguments for POST /score
+    params = {'shap': 'true' if explain else 'false'}
+    if model is not None:
+        params['model'] = model
+    if binary:
+        # Arrow IPC both ways, results decode straight into NumPy arrays
+        return {'params': params, 'data': frame_arrow_bytes(df),
+                'headers': {'Content-Type': ARROW_MIME, 'Accept': ARROW_MIME}}
+    return {'params': params, 'json': df.to_dict(orient='list')}
 
+
+def call_api(df, single_prediction=False, explain=True, binary=False, client=None, model=None):
+    # Combined endpoint: one request, one decode/encode on the server
+    client = client or api_client
     try:
-        # Send POST request for prediction
-        response_predict = requests.post(predict_url, json=data_json)
-        if response_predict.status_code != 200:
-            print(f"Prediction API returned status code: {response_predict.status_code}")
-            return None, None
-
-        result = response_predict.json()
-        if single_prediction:
-            churn_probability = result.get("churn_probability")
-            predictions = churn_probability
-        else:
-            churn_probabilities = result.get("churn_probabilities")
-            predictions = churn_probabilities
-
-        # Send POST request for SHAP values
-        response_shap = requests.post(explain_url, json=data_json)
-        if response_shap.status_code != 200:
-            print(f"SHAP API returned status code: {response_shap.status_code}")
-            return None, None
-
-        shap_values = response_shap.json().get("shap_values")
+        response = client.post("/score", **_score_request(df, explain, binary, model))
+        return _read_score_response(response, single_prediction, binary)
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling API: {e}")
+        return None, None
 
-        return predictions, shap_values
+
+async def call_api_async(df, single_prediction=False, explain=True, binary=False, client=None):
+    # Same as call_api without blocking the caller's event loop
+    client = client or api_client
+    try:
+        response = await client.apost("/score", **_score_request(df, explain, binary))
+        return _read_score_response(response, single_prediction, binary)
     except requests.exceptions.RequestException as e:
         print(f"Error calling API: {e}")
         return None, None
 
 
+def _read_score_response(response, single_prediction, binary):
+    if response.status_code != 200:
+        print(f"Score API returned status code: {response.status_code}")
+        return None, None
 
+    if binary:
+        churn_probabilities, shap_values = read_arrow_response(response.content)
+        predictions = churn_probabilities[0] if single_prediction else churn_probabilities
+        return predictions, shap_values
 
-def collect_encode_ui(data_dict=None, input_df=None, single_input=False):
-    if input_df is None:
-        # If input_df is not provided, create DataFrame from the provided dictionary.
-        df = pd.DataFrame(data_dict)
-        
-    elif input_df is not None:
-        
-        df = input_df
+    result = response.json()
+    churn_probabilities = result.get("churn_probabilities")
+    if single_prediction and churn_probabilities is not None:
+        predictions = churn_probabilities[0]
     else:
+        predictions = churn_probabilities
+
+    shap_values = result.get("shap_values")
+
+    return predictions, shap_values
+
+
+
+
+def _sweep_request(customer, sweeps, grid, model=None):
+    # Keyword arguments for POST /sweep; customer is a dict of the 19 raw fields
+    params = {'model': model} if model is not None else {}
+    return {'params': params, 'json': {'customer': customer, 'sweeps': sweeps, 'grid': grid}}
+
+
+def _read_sweep_response(response):
+    if response.status_code != 200:
+        print(f"Sweep API returned status code: {response.status_code}: {response.text[:200]}")
+        return None
+    return response.json()
+
+
+def call_sweep(customer, sweeps, grid=False, client=None, model=None):
+    # What-if curves for one customer, scored by the server in a single model call
+    client = client or api_client
+    try:
+        return _read_sweep_response(client.post("/sweep", **_sweep_request(customer, sweeps, grid, model)))
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling API: {e}")
+        return None
+
+
+async def call_sweep_async(customer, sweeps, grid=False, client=None, model=None):
+    client = client or api_client
+    try:
+        response = await client.apost("/sweep", **_sweep_request(customer, sweeps, grid, model))
+        return _read_sweep_response(response)
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling API: {e}")
+        return None
+
+
+def collect_encode_ui(data_dict=None, input_df=None, single_input=False):
+    if input_df is None and data_dict is None:
         raise ValueError("Either input_df or reactive variables must be provided.")
 
-    # Apply one-hot encoding to include all possible categories
-    columns_to_encode = ['Contract', 'InternetService', 'PaymentMethod']
-    if all(col in df.columns for col in columns_to_encode):
-        df_encoded = pd.get_dummies(df, columns=columns_to_encode, drop_first=False)
+    # Encode straight into the model layout, raw or already one-hot encoded input
+    source = data_dict if input_df is None else input_df
+    encoded = encode_columns(source)
+
+    # Typed DataFrame (category / int64 / float64) in the 26-column model order
+    return to_frame(encoded)
+
+
+
+
+class RejectedRows:
+    """Upload rows that failed schema validation, appended to a CSV with their errors."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        if os.path.exists(path):
+            os.remove(path)
+
+    def add(self, chunk, report, row_numbers):
+        # chunk: the validated rows as read; row_numbers: their 0-based rows in the upload
+        if report.all_valid:
+            return
+        invalid = report.invalid_rows
+        messages = report.row_messages()
+        rejected = chunk.iloc[invalid].copy()
+        rejected.insert(0, 'Row', np.asarray(row_numbers)[invalid])
+        rejected['Validation Errors'] = [messages.get(row, "not reported (error limit reached)") for row in invalid.tolist()]
+        rejected.to_csv(self.path, mode='a', index=False, header=self.rows == 0)
+        self.rows += len(invalid)
+
+
+def rejected_path(output_path):
+    # Rejected rows of an upload sit next to its predictions file
+    return os.path.join(os.path.dirname(os.path.abspath(output_path)), "rejected.csv")
+
+
+def _shap_param(explain):
+    if explain == 'summary':
+        return 'summary'
+    return 'true' if explain else 'false'
+
+
+def call_api_stream(chunks, explain=False):
+    # Streams encoded chunks to /score/stream as NDJSON and yields one result dict per chunk.
+    # explain='summary' adds a final {'shap_summary': ...} line instead of per-row SHAP.
+    def body():
+        for chunk in chunks:
+            encoded = collect_encode_ui(input_df=chunk)
+            yield (json.dumps(encoded.to_dict(orient='list')) + "\n").encode()
+
+    with api_client.post_stream("/score/stream", data=body(), params={'shap': _shap_param(explain)},
+                         headers={'Content-Type': 'application/x-ndjson'}, stream=True) as response:
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(
+                f"Stream API returned status code: {response.status_code}: {response.text.strip()}")
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def score_csv_stream(data, output_path, explain=False, chunk_size=STREAM_CHUNK_SIZE, progress=None, rejected=None):
+    # Scores a CSV chunk by chunk and appends predictions to output_path as they arrive.
+    # Returns (rows scored, SHAP values of the first chunk) so memory stays bounded by chunk_size,
+    # or (rows scored, server-side SHAP summary) with explain='summary'.
+    # Rows failing validation are not sent: their prediction is empty and they go to `rejected`.
+    rows = 0
+    first_shap = None
+    valid_masks = []
+    sent = {'rows': 0}
+
+    def valid_chunks():
+        for chunk in iter_csv_chunks(data, chunk_size):
+            report = validate_columns(chunk)
+            if rejected is not None:
+                rejected.add(chunk, report, sent['rows'] + np.arange(len(chunk)))
+            valid_masks.append(report.valid)
+            sent['rows'] += len(chunk)
+            yield pd.DataFrame(report.valid_columns())
+
+    with open(output_path, 'w', newline='') as out:
+        for result in call_api_stream(valid_chunks(), explain=explain):
+            if 'error' in result:
+                raise ValueError(result['error'])
+            if 'shap_summary' in result:
+                first_shap = result['shap_summary']
+                continue
+            valid = valid_masks.pop(0)
+            if len(result['churn_probabilities']) != valid.sum():
+                raise ValueError(f"Stream API returned {len(result['churn_probabilities'])} results "
+                                 f"for a chunk of {valid.sum()} rows")
+            probabilities = np.full(len(valid), np.nan)
+            probabilities[valid] = result['churn_probabilities']
+            pd.DataFrame({'Churn Prediction': probabilities}).to_csv(out, index=False, header=rows == 0)
+            rows += len(valid)
+            if progress is not None:
+                progress(rows)
+            if first_shap is None and explain != 'summary':
+                first_shap = result.get('shap_values')
+    # A dropped or truncated stream must fail the job rather than leave a short predictions file
+    if rows != sent['rows']:
+        raise ValueError(f"Stream API returned {rows} of {sent['rows']} rows")
+    return rows, first_shap
+
+
+def default_model_ref(client=None):
+    # "name@version" of the API's default model, from GET /models
+    client = client or api_client
+    response = client.get("/models")
+    response.raise_for_status()
+    listing = response.json()
+    for model in listing['models']:
+        if model['name'] == listing['default']:
+            return f"{model['name']}@{model['version']}"
+    raise ValueError(f"Default model '{listing['default']}' is not listed by the API")
+
+
+def score_csv_incremental(data, output_path, store, chunk_size=STREAM_CHUNK_SIZE, client=None, progress=None,
+                          rejected=None):
+    # Like score_csv_stream(explain='summary'), but rows whose fingerprint (customerID + content
+    # hash) matches a stored result of the same model version are not sent to the API again.
+    # Returns (rows scored, SHAP summary over the valid rows, reuse stats).
+    client = client or api_client
+    model_ref = default_model_ref(client)
+    store.drop_other_versions(model_ref)
+
+    summary = ShapSummary(ENCODED_COLUMNS)
+    rows = reused = invalid = 0
+    with open(output_path, 'w', newline='') as out:
+        for chunk in iter_csv_chunks(data, chunk_size):
+            keys, hashes = row_fingerprints(chunk)
+            hit, probabilities, shap_values = store.lookup(keys, hashes, model_ref, len(ENCODED_COLUMNS))
+
+            missing = np.flatnonzero(~hit)
+            if len(missing):
+                # Only rows passing the schema are sent (blank TotalCharges is valid and becomes NaN)
+                changed = chunk.iloc[missing]
+                report = validate_columns(changed)
+                if rejected is not None:
+                    rejected.add(changed, report, rows + missing)
+                invalid += len(report.invalid_rows)
+                missing = missing[report.valid]
+            if len(missing):
+                # Pinned to the version the store is keyed on; a reloaded model fails the call
+                encoded = collect_encode_ui(data_dict=report.valid_columns())
+                new_probabilities, new_shap = call_api(encoded, explain=True, binary=True, client=client,
+                                                       model=model_ref)
+                if new_probabilities is None:
+                    raise ValueError("Scoring API call failed")
+                probabilities[missing] = new_probabilities
+                shap_values[missing] = new_shap
+                store.store([keys[i] for i in missing], [hashes[i] for i in missing], model_ref,
+                            new_probabilities, new_shap)
+
+            pd.DataFrame({'Churn Prediction': probabilities}).to_csv(out, index=False, header=rows == 0)
+            summary.update(shap_values[~np.isnan(probabilities)])
+            rows += len(chunk)
+            reused += int(hit.sum())
+            if progress is not None:
+                progress(rows)
+
+    stats = {'rows': rows, 'reused': reused, 'scored': rows - reused - invalid, 'invalid': invalid,
+             'reuse_ratio': reused / rows if rows else 0.0, 'model': model_ref}
+    return rows, summary.result(), stats
+
+
+def explain_row(csv_path, row_index, client=None):
+    # Per-row SHAP on demand: read a single row of a stored upload and explain it.
+    # Returns (SHAP values, None) or (None, message) when the row is invalid or the call fails.
+    client = client or api_client
+    row = pd.read_csv(csv_path, skiprows=range(1, row_index + 1), nrows=1)
+    if row.empty:
+        return None, f"Row {row_index} is not in the file"
+    try:
+        report = validate_columns(row)
+    except SchemaError as e:
+        return None, str(e)
+    if not report.all_valid:
+        return None, "; ".join(report.row_messages().values())
+    try:
+        response = client.post("/explain", json=collect_encode_ui(data_dict=report.columns).to_dict(orient='list'))
+        if response.status_code != 200:
+            print(f"SHAP API returned status code: {response.status_code}")
+            return None, f"SHAP API returned status code: {response.status_code}"
+        return response.json().get("shap_values"), None
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling API: {e}")
+        return None, f"Error calling API: {e}"
+
+
+def count_csv_rows(path):
+    # Data rows in a CSV (lines minus the header), for job progress
+    with open(path, 'rb') as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def run_scoring_job(input_path, output_path, progress):
+    # JobQueue handler: score one uploaded CSV chunk by chunk, reporting rows done after each chunk
+    progress(0, count_csv_rows(input_path))
+    rejected = RejectedRows(rejected_path(output_path))
+    if SCORE_STORE_PATH:
+        # Unchanged rows from earlier uploads come from the local store
+        rows, summary, reuse = score_csv_incremental(input_path, output_path, ScoreStore(SCORE_STORE_PATH),
+                                                     progress=progress, rejected=rejected)
     else:
-        df_encoded = df  # If already encoded, skip one-hot encoding
-
-    # Reorder columns
-    column_order = [
-        'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
-        'PhoneService', 'MultipleLines', 'OnlineSecurity', 'OnlineBackup',
-        'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
-        'PaperlessBilling', 'MonthlyCharges', 'TotalCharges',
-        'Contract_Month-to-month', 'Contract_One year', 'Contract_Two year',
-        'InternetService_DSL', 'InternetService_Fiber optic', 'InternetService_No',
-        'PaymentMethod_Bank transfer (automatic)', 'PaymentMethod_Credit card (automatic)',
-        'PaymentMethod_Electronic check', 'PaymentMethod_Mailed check'
-    ]
-    
-    # Reindex to maintain column order
-    df_encoded = df_encoded.reindex(columns=column_order, fill_value=0)
-
-    # Correct data types
-    categorical_columns = [
-        'gender', 'Partner', 'Dependents', 'PhoneService', 'MultipleLines',
-        'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport',
-        'StreamingTV', 'StreamingMovies', 'PaperlessBilling'
-    ]
-    df_encoded[categorical_columns] = df_encoded[categorical_columns].astype('category')
-    df_encoded[['SeniorCitizen', 'tenure']] = df_encoded[['SeniorCitizen', 'tenure']].astype('int64')
-    df_encoded[['MonthlyCharges', 'TotalCharges']] = df_encoded[['MonthlyCharges', 'TotalCharges']].astype('float64')
-
-    return df_encoded
+        rows, summary = score_csv_stream(input_path, output_path, explain='summary', progress=progress,
+                                         rejected=rejected)
+        reuse = None
+    print(f"Predictions received: {rows} rows written to {output_path}, {rejected.rows} rejected")
+    return {'rows': rows, 'shap_summary': summary, 'reuse': reuse,
+            'rejected_rows': rejected.rows, 'rejected_path': rejected.path if rejected.rows else None}
 
 
+_job_queue = None
+
+
+def get_job_queue():
+    # Created on first use so importing utils doesn't touch JOBS_DIR
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(run_scoring_job)
+        _job_queue.start()
+    return _job_queue
+
+
+# Seconds between job progress refreshes in the upload widget
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "1"))
+
+# Job of the current session; a refreshed page can pick it again from the session's recent jobs
+current_job = solara.reactive(None)
 
 
 @solara.component
-def FileDropCSVReader(predictions_batch, shap_values_batch):
-    df_state, set_df_state = solara.use_state(None)
-    transformed_df_state, set_transformed_df_state = solara.use_state(None)
+def FileDropCSVReader(predictions_batch, shap_values_batch, uploaded_file=None, reuse_stats=None):
+    queue = get_job_queue()
+    tick, set_tick = solara.use_state(0)
+    job = queue.get(current_job.value) if current_job.value else None
+    status = job['status'] if job is not None else None
+    active = status in ('queued', 'running')
+
+    def poll():
+        # Re-render periodically while the job is queued or running
+        if active:
+            time.sleep(JOB_POLL_SECONDS)
+            set_tick(tick + 1)
+
+    solara.use_thread(poll, dependencies=[current_job.value, tick, active])
+
+    def publish():
+        # Results come from the job store, so they are available again after a page refresh
+        if status != 'done':
+            return
+        result = job['result']
+        predictions_batch.value = job['output_path']
+        shap_values_batch.value = result['shap_summary']
+        if uploaded_file is not None:
+            uploaded_file.value = job['input_path']
+        if reuse_stats is not None:
+            reuse_stats.value = result.get('reuse')
+
+    solara.use_effect(publish, [current_job.value, status])
 
     def on_file(f: FileInfo):
-        if not f["data"]:
+        if not f["file_obj"]:
             return
-        new_df = load_df(BytesIO(f["data"]))
-        set_df_state(new_df)
-
-        transformed_df = collect_encode_ui(input_df=new_df, single_input=False)
-        set_transformed_df_state(transformed_df)
-
-        # Call the API to get predictions and SHAP values
-        churn_probabilities, shap_vals = call_api(transformed_df)
-        
-        if churn_probabilities is not None:
-            predictions_batch.value = churn_probabilities
-            shap_values_batch.value = shap_vals
-            print(f"Predictions received: {churn_probabilities}")
-        else:
-            print('No predictions returned')
+        current_job.value = queue.submit(f["file_obj"], name=f["name"], owner=solara.get_session_id())
 
     solara.FileDrop(
         label="Drop a CSV here",
         on_file=on_file,
-        lazy=False
+        lazy=True
     )
+    if active:
+        total = job['rows_total']
+        done = f"{job['rows_done']:,} of {total:,} rows" if total else "starting"
+        solara.Info(f"Job {job['id']} {status}: {done}", icon="spinner")
+        solara.ProgressLinear(value=job['progress'] * 100)
+    elif status == 'failed':
+        solara.Error(f"Job {job['id']} failed: {job['error']}")
+    elif status == 'done' and reuse_stats is not None and reuse_stats.value:
+        stats = reuse_stats.value
+        solara.Info(f"Reused {stats['reused']:,} of {stats['rows']:,} rows ({stats['reuse_ratio']:.1%}) "
+                    f"from previous uploads, scored {stats['scored']:,} new or changed rows")
+    if status == 'done' and job['result'].get('rejected_rows'):
+        solara.Warning(f"{job['result']['rejected_rows']:,} rows failed validation and were not scored, "
+                       f"see {job['result']['rejected_path']}")
+
+    recent = queue.recent(solara.get_session_id())
+    if recent:
+        solara.Select(label="Recent jobs", value=current_job, values=[j['id'] for j in recent])
 
 @solara.component
 def Page():
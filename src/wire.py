@@ -0,0 +1,67 @@
+import numpy as np
+
+from encoder import ENCODED_COLUMNS
+
+
+# Columnar binary format, negotiated per request. JSON stays the default.
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+
+def wants_arrow(request):
+    return request.accept_mimetypes.best_match(["application/json", ARROW_MIME]) == ARROW_MIME
+
+
+def decode_columns(request):
+    """Request body as a column mapping: JSON dict of lists, or Arrow IPC columns as NumPy arrays."""
+    if request.mimetype != ARROW_MIME:
+        return request.get_json()
+
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(request.get_data()).read_all()
+    # Numeric columns convert without copying, string/dictionary columns decode to object arrays
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def arrow_table_bytes(columns):
+    import pyarrow as pa
+
+    table = columns if isinstance(columns, pa.Table) else pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_response(churn_probabilities=None, shap_values=None):
+    from flask import Response
+
+    # One float64 column per output: churn_probability and/or shap_<feature>
+    columns = {}
+    if churn_probabilities is not None:
+        columns['churn_probability'] = np.asarray(churn_probabilities, dtype=np.float64)
+    if shap_values is not None:
+        shap_values = np.asarray(shap_values, dtype=np.float64)
+        for idx, col in enumerate(ENCODED_COLUMNS):
+            columns[f"shap_{col}"] = shap_values[:, idx]
+    return Response(arrow_table_bytes(columns), status=200, mimetype=ARROW_MIME)
+
+
+def frame_arrow_bytes(df):
+    """Client side: DataFrame -> Arrow IPC request body."""
+    import pyarrow as pa
+
+    return arrow_table_bytes(pa.Table.from_pandas(df, preserve_index=False))
+
+
+def read_arrow_response(content):
+    """Client side: Arrow IPC response -> (churn probabilities, SHAP matrix) as NumPy arrays."""
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(content).read_all()
+    churn_probabilities = table.column('churn_probability').to_numpy() if 'churn_probability' in table.column_names else None
+    shap_columns = [f"shap_{col}" for col in ENCODED_COLUMNS]
+    shap_values = None
+    if shap_columns[0] in table.column_names:
+        shap_values = np.column_stack([table.column(col).to_numpy() for col in shap_columns])
+    return churn_probabilities, shap_values